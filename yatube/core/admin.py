@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import OutboxEmail
+
+
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'subject', 'recipients', 'status', 'attempts', 'created',
+        'sent_at'
+    )
+    search_fields = ('subject', 'recipients')
+    list_filter = ('status', 'created')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
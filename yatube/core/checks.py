@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Кеши, копия которых своя у каждого процесса
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """Сессии в кеше требуют кеша, общего для всех процессов.
+
+    Иначе выход, сброс или смена ключа сессии в одном процессе
+    не видны остальным, и они продолжают обслуживать старую сессию.
+    """
+    if settings.SESSION_ENGINE not in CACHED_SESSION_ENGINES:
+        return []
+    backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'Сессии хранятся в кеше, который у каждого процесса свой',
+        hint=(
+            'Укажите в CACHES общий кеш (файловый, в базе или memcached) '
+            'или SESSION_ENGINE = "django.contrib.sessions.backends.db"'
+        ),
+        id='core.W001',
+    )]
@@ -0,0 +1,10 @@
+from posts.mentions import unread_count
+
+
+def mentions(request):
+    """Добавляет число непрочитанных упоминаний пользователя."""
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'unread_mentions': unread_count(request.user.pk)
+    }
@@ -0,0 +1,177 @@
+"""Публикация событий для Server-Sent Events с коротким опросом.
+
+События публикуются в канал и получают возрастающий номер. Запрос
+потока не держит поток сервера: он сразу отдаёт события новее
+Last-Event-ID и закрывается, а браузер переподключается через
+EVENTS_RETRY секунд и передаёт номер последнего события. Хранение
+событий вынесено в сменный транспорт, выбранный настройкой
+EVENTS_TRANSPORT:
+
+* LocalTransport — каналы в памяти процесса, события видят только
+  клиенты того же процесса (один процесс сервера, тесты);
+* CacheTransport — каналы в кеше EVENTS_CACHE для нескольких
+  процессов. Номера событий выдаёт cache.incr, поэтому кеш должен
+  увеличивать счётчик атомарно (memcached, Redis).
+"""
+import json
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+from yatube.settings import (
+    EVENTS_BUFFER_SIZE, EVENTS_CACHE, EVENTS_RETRY, EVENTS_TIMEOUT,
+    EVENTS_TRANSPORT
+)
+
+# После стольких каналов в памяти процесса самые давние выбрасываются
+MAX_LOCAL_CHANNELS = 10000
+# Кеши, в которых incr атомарен
+ATOMIC_CACHES = (
+    'django.core.cache.backends.memcached.MemcachedCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+)
+
+
+class LocalTransport:
+    """Каналы событий в памяти процесса.
+
+    Для каждого канала хранятся номер последнего события и последние
+    EVENTS_BUFFER_SIZE событий.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = OrderedDict()
+
+    def publish(self, channel, event):
+        with self.lock:
+            last_id, events = self.channels.pop(
+                channel, (0, deque(maxlen=EVENTS_BUFFER_SIZE))
+            )
+            events.append((last_id + 1, event))
+            self.channels[channel] = (last_id + 1, events)
+            if len(self.channels) > MAX_LOCAL_CHANNELS:
+                self.channels.popitem(last=False)
+        return last_id + 1
+
+    def current_id(self, channel):
+        with self.lock:
+            return self.channels.get(channel, (0, ()))[0]
+
+    def pending(self, channel, last_id):
+        with self.lock:
+            return [
+                (event_id, event)
+                for event_id, event in self.channels.get(channel, (0, ()))[1]
+                if event_id > last_id
+            ]
+
+
+class CacheTransport:
+    """Каналы событий в общем кеше для нескольких процессов.
+
+    Номер последнего события канала хранится отдельным ключом, само
+    событие — под ключом с его номером. Все ключи живут EVENTS_TIMEOUT
+    секунд, номер продлевается при каждой публикации.
+    """
+    LAST_ID_KEY = 'events:{}:last'
+    EVENT_KEY = 'events:{}:{}'
+
+    def __init__(self):
+        backend = settings.CACHES[EVENTS_CACHE]['BACKEND']
+        if backend not in ATOMIC_CACHES:
+            raise ImproperlyConfigured(
+                f'CacheTransport нужен кеш с атомарным incr, а {EVENTS_CACHE} '
+                f'использует {backend}'
+            )
+        self.cache = caches[EVENTS_CACHE]
+
+    def publish(self, channel, event):
+        key = self.LAST_ID_KEY.format(channel)
+        self.cache.add(key, 0, EVENTS_TIMEOUT)
+        event_id = self.cache.incr(key)
+        self.cache.touch(key, EVENTS_TIMEOUT)
+        self.cache.set(
+            self.EVENT_KEY.format(channel, event_id), event, EVENTS_TIMEOUT
+        )
+        return event_id
+
+    def current_id(self, channel):
+        return self.cache.get(self.LAST_ID_KEY.format(channel), 0)
+
+    def pending(self, channel, last_id):
+        current = self.current_id(channel)
+        if current <= last_id:
+            return []
+        first = max(last_id + 1, current - EVENTS_BUFFER_SIZE + 1)
+        keys = {
+            self.EVENT_KEY.format(channel, event_id): event_id
+            for event_id in range(first, current + 1)
+        }
+        found = self.cache.get_many(list(keys))
+        return sorted((keys[key], event) for key, event in found.items())
+
+
+transport = import_string(EVENTS_TRANSPORT)()
+
+
+def publish(channel, event_type, data):
+    """Публикует событие в канал и возвращает его номер."""
+    return transport.publish(channel, {'type': event_type, 'data': data})
+
+
+def current_id(channel):
+    """Номер последнего события канала."""
+    return transport.current_id(channel)
+
+
+def pending(channel, last_id):
+    """События канала новее last_id, не больше EVENTS_BUFFER_SIZE."""
+    return transport.pending(channel, last_id)
+
+
+def stream(channel, last_id):
+    """Текст ответа в формате text/event-stream.
+
+    Если событий нет, отдаётся только номер last_id, чтобы браузер
+    при переподключении продолжил с него. Номер больше последнего
+    значит, что нумерация канала началась заново (перезапуск процесса,
+    истёкший ключ), и канал отдаётся с начала.
+    """
+    yield f'retry: {EVENTS_RETRY * 1000}\n\n'
+    if last_id > current_id(channel):
+        last_id = 0
+    events = pending(channel, last_id)
+    if not events:
+        yield f'id: {last_id}\n\n'
+    for event_id, event in events:
+        yield (
+            f'id: {event_id}\n'
+            f'event: {event["type"]}\n'
+            f'data: {json.dumps(event["data"], ensure_ascii=False)}\n\n'
+        )
+
+
+def event_stream_response(request, channel):
+    """Ответ с событиями канала.
+
+    Новый клиент получает только события, опубликованные после
+    подключения, переподключившийся — ещё и пропущенные.
+    """
+    try:
+        last_id = int(request.META['HTTP_LAST_EVENT_ID'])
+    except (KeyError, ValueError):
+        last_id = current_id(channel)
+    response = StreamingHttpResponse(
+        stream(channel, last_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Иначе nginx копит поток в буфере и события приходят с задержкой
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,59 @@
+"""HyperLogLog — оценка числа уникальных значений в памяти фиксированного
+размера.
+
+При точности p в скетче 2**p однобайтовых регистров, стандартная
+ошибка оценки около 1.04 / sqrt(2**p). Скетчи одного размера
+объединяются поэлементным максимумом, поэтому их можно копить
+по частям и сливать. Для хранения регистры сжимаются zlib: у скетча
+с небольшим числом значений почти все регистры нулевые.
+"""
+import hashlib
+import math
+import zlib
+
+HASH_BITS = 64
+
+
+class HyperLogLog:
+    def __init__(self, precision, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = (
+            bytearray(registers) if registers else bytearray(self.size)
+        )
+        if len(self.registers) != self.size:
+            raise ValueError('Размер регистров не совпадает с точностью')
+
+    def add(self, value):
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big'
+        )
+        index = hashed >> (HASH_BITS - self.precision)
+        rest_bits = HASH_BITS - self.precision
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Скетчи разной точности нельзя объединить')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size ** 2 / sum(
+            2.0 ** -register for register in self.registers
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Для малых чисел точнее линейный подсчёт пустых регистров
+            estimate = self.size * math.log(self.size / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        return zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data, precision):
+        return cls(precision, zlib.decompress(data) if data else None)
@@ -0,0 +1,197 @@
+"""Очередь исходящих писем.
+
+QueuedEmailBackend вместо отправки сохраняет письма в таблицу
+OutboxEmail, поэтому запрос не ждёт почтовый сервер. Команда
+send_queued_mail забирает письма пачками и отправляет их через одно
+соединение с настоящим почтовым движком OUTBOX_DELIVERY_BACKEND.
+"""
+import hashlib
+import json
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from yatube.settings import (
+    OUTBOX_CLAIM_TIMEOUT, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_DELAY
+)
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _dump(addresses):
+    # Адреса хранятся списком JSON: в имени получателя бывает запятая
+    return json.dumps(list(addresses), ensure_ascii=False)
+
+
+def _load(addresses):
+    return json.loads(addresses) if addresses else []
+
+
+def _html_body(message):
+    """HTML-версия письма; другие вложения очередь не хранит."""
+    if message.attachments:
+        raise ValueError('Письма с вложениями нельзя поставить в очередь')
+    html_body = ''
+    for content, mimetype in getattr(message, 'alternatives', []):
+        if mimetype != 'text/html' or html_body:
+            raise ValueError(
+                f'Альтернативу {mimetype} нельзя поставить в очередь'
+            )
+        html_body = content
+    return html_body
+
+
+def to_outbox(message):
+    """Превращает EmailMessage в строку очереди.
+
+    Вложения и альтернативы кроме одной HTML-версии не сохраняются,
+    поэтому такие письма отклоняются с ValueError.
+    """
+    fields = {
+        'subject': message.subject,
+        'body': message.body,
+        'html_body': _html_body(message),
+        'from_email': message.from_email,
+        'recipients': _dump(message.to),
+        'cc': _dump(message.cc),
+        'bcc': _dump(message.bcc),
+        'reply_to': _dump(message.reply_to),
+        'headers': json.dumps(message.extra_headers, sort_keys=True)
+        if message.extra_headers else '',
+    }
+    digest = hashlib.sha256(
+        '\0'.join(fields[name] for name in sorted(fields)).encode()
+    ).hexdigest()
+    return OutboxEmail(dedup_key=digest, **fields)
+
+
+def to_message(email):
+    """Собирает письмо для отправки из строки очереди."""
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email,
+        to=_load(email.recipients),
+        cc=_load(email.cc),
+        bcc=_load(email.bcc),
+        reply_to=_load(email.reply_to),
+        headers=json.loads(email.headers) if email.headers else None,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый движок, который только ставит письма в очередь.
+
+    Письмо, такое же как уже ждущее отправки, повторно не ставится.
+    """
+
+    def send_messages(self, email_messages):
+        emails = [
+            to_outbox(message) for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.bulk_create(emails, ignore_conflicts=True)
+        return len(emails)
+
+
+def claim_batch(batch_size=100):
+    """Забирает пачку писем, готовых к отправке.
+
+    Письма помечаются меткой запуска и откладываются на
+    OUTBOX_CLAIM_TIMEOUT одним условным UPDATE, поэтому параллельная
+    отправка их не получит, а транзакция не ждёт почтовый сервер.
+    """
+    now = timezone.now()
+    claim = uuid.uuid4().hex
+    with transaction.atomic():
+        ready = OutboxEmail.objects.filter(
+            status=OutboxEmail.QUEUED, next_attempt_at__lte=now
+        )
+        ids = list(ready.values_list('pk', flat=True)[:batch_size])
+        ready.filter(pk__in=ids).update(
+            claim=claim,
+            next_attempt_at=now + timedelta(seconds=OUTBOX_CLAIM_TIMEOUT)
+        )
+    return list(OutboxEmail.objects.filter(claim=claim))
+
+
+def is_connection_error(error):
+    """Ошибка соединения с сервером, а не отказ принять это письмо."""
+    if isinstance(error, (
+        smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError
+    )):
+        return True
+    # SMTPException — наследник OSError, но означает ответ сервера
+    return isinstance(error, OSError) and not isinstance(
+        error, smtplib.SMTPException
+    )
+
+
+def deliver_batch(connection, batch_size=100):
+    """Отправляет очередную пачку писем через соединение.
+
+    Результат записывается сразу после каждого письма. Письма, которые
+    сервер отверг, откладываются с удвоением паузы, после
+    OUTBOX_MAX_ATTEMPTS попыток помечаются недоставленными. При обрыве
+    соединения оно закрывается, а письмо и остаток пачки откладываются
+    на OUTBOX_RETRY_DELAY без траты попыток: письма в этом не виноваты.
+    Возвращает словарь со счётчиками sent, retried, failed и deferred.
+    """
+    counters = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+    batch = claim_batch(batch_size)
+    for position, email in enumerate(batch):
+        claimed = OutboxEmail.objects.filter(pk=email.pk, claim=email.claim)
+        try:
+            connection.send_messages([to_message(email)])
+        except Exception as error:
+            if is_connection_error(error):
+                connection.close()
+                logger.warning('Соединение с почтовым сервером: %r', error)
+                rest = batch[position:]
+                OutboxEmail.objects.filter(
+                    pk__in=[row.pk for row in rest], claim=email.claim
+                ).update(
+                    last_error=repr(error),
+                    claim='',
+                    next_attempt_at=timezone.now() + timedelta(
+                        seconds=OUTBOX_RETRY_DELAY
+                    )
+                )
+                counters['deferred'] += len(rest)
+                break
+            attempts = email.attempts + 1
+            status = OutboxEmail.QUEUED
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                status = OutboxEmail.FAILED
+                counters['failed'] += 1
+                logger.error('Письмо %s не доставлено: %r', email.pk, error)
+            else:
+                counters['retried'] += 1
+            claimed.update(
+                attempts=attempts,
+                last_error=repr(error),
+                status=status,
+                claim='',
+                next_attempt_at=timezone.now() + timedelta(
+                    seconds=OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+                )
+            )
+        else:
+            claimed.update(
+                status=OutboxEmail.SENT,
+                sent_at=timezone.now(),
+                last_error='',
+                claim=''
+            )
+            counters['sent'] += 1
+    return counters
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.loader import get_template
+
+from core.utils import elided_page_range
+
+PAGINATOR_TEMPLATE = 'posts/includes/paginator.html'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки и размер навигации по страницам '
+        'с полным и сокращённым списком номеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            nargs='+',
+            default=[10, 1000, 100000],
+            help='Числа страниц, для которых строить навигацию'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз отрисовывать навигацию для замера'
+        )
+
+    def render(self, page, page_range, repeat):
+        template = get_template(PAGINATOR_TEMPLATE)
+        page.elided_page_range = page_range
+        started = time.perf_counter()
+        for _ in range(repeat):
+            html = template.render({'page_obj': page})
+        elapsed = (time.perf_counter() - started) / repeat
+        return elapsed * 1000, len(html.encode())
+
+    def handle(self, *args, **options):
+        for num_pages in options['pages']:
+            # range не хранит объекты, поэтому страниц может быть сколько
+            # угодно
+            paginator = Paginator(range(num_pages), 1)
+            page = paginator.page((num_pages + 1) // 2)
+            for label, page_range in (
+                ('полный', paginator.page_range),
+                ('сокращённый', elided_page_range(page)),
+            ):
+                ms, size = self.render(page, page_range, options['repeat'])
+                self.stdout.write(
+                    f'{num_pages:>8} стр., {label:>11}: '
+                    f'{ms:8.2f} мс, {size:>9} байт'
+                )
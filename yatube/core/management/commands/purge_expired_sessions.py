@@ -0,0 +1,45 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Ключи пачки передаются в IN (...), а SQLite принимает не больше
+# 999 параметров на запрос
+MAX_BATCH_SIZE = 900
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии небольшими пачками, не блокируя '
+        'таблицу сессий надолго'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=MAX_BATCH_SIZE,
+            help=(
+                'Сколько сессий удалять за один запрос '
+                f'(не больше {MAX_BATCH_SIZE})'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options['batch_size'] <= MAX_BATCH_SIZE:
+            raise CommandError(
+                f'--batch-size должен быть от 1 до {MAX_BATCH_SIZE}'
+            )
+        expired = Session.objects.filter(
+            expire_date__lt=timezone.now()
+        ).order_by('pk')
+        total = 0
+        while True:
+            keys = list(
+                expired.values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            total += Session.objects.filter(pk__in=keys).delete()[0]
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено истёкших сессий: {total}')
+        )
@@ -0,0 +1,77 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core.mail import deliver_batch, is_connection_error
+from yatube.settings import OUTBOX_DELIVERY_BACKEND
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками через одно соединение'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько писем забирать из очереди за раз'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые письма'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между проверками пустой очереди (в секундах)'
+        )
+
+    def deliver(self, connection, batch_size):
+        """Пачка писем через соединение, открытое только на неё.
+
+        За паузу ожидания сервер может закрыть соединение, а open()
+        у открытого соединения этого не заметит.
+        """
+        try:
+            connection.open()
+        except Exception as error:
+            if not is_connection_error(error):
+                raise
+            self.stderr.write(f'Почтовый сервер недоступен: {error!r}')
+            return {'deferred': 0}, False
+        try:
+            counters = deliver_batch(connection, batch_size)
+        finally:
+            connection.close()
+        return counters, not counters['deferred']
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+        started = time.monotonic()
+        connection = get_connection(OUTBOX_DELIVERY_BACKEND)
+        try:
+            while True:
+                counters, reachable = self.deliver(
+                    connection, options['batch_size']
+                )
+                for name, value in counters.items():
+                    totals[name] += value
+                # Пока сервер недоступен, очередь ждёт паузу
+                if reachable and sum(counters.values()):
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Отправлено: {totals["sent"]}, '
+            f'отложено: {totals["retried"]}, '
+            f'не доставлено: {totals["failed"]}, '
+            f'отложено из-за соединения: {totals["deferred"]}, '
+            f'{totals["sent"] / elapsed:.1f} писем/с'
+        ))
@@ -0,0 +1,168 @@
+import json
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+from yatube.settings import RATELIMIT_PROXIES, RATELIMITS
+
+from .ratelimit import hit
+
+# Файлы с хешем в имени не меняются, их можно кешировать навсегда
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+ENCODING_SPLIT_RE = re.compile(r'\s*,\s*')
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = f'W/"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.immutable = immutable
+        self.variants = {
+            encoding: path + suffix for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        }
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT, не доходя до представлений.
+
+    Список файлов читается один раз при запуске, поэтому на запрос
+    приходится поиск в словаре и отдача файла. Файлы из манифеста
+    получают заголовки кеширования на год, заранее сжатые копии
+    выбираются по Accept-Encoding.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = {}
+        if settings.STATIC_ROOT and os.path.isdir(settings.STATIC_ROOT):
+            self.files = self.scan(settings.STATIC_ROOT)
+
+    def scan(self, root):
+        hashed = set()
+        manifest_path = os.path.join(root, 'staticfiles.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest:
+                hashed = set(json.load(manifest).get('paths', {}).values())
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                files[self.prefix + name] = StaticFile(path, name in hashed)
+        return files
+
+    def __call__(self, request):
+        static_file = self.files.get(request.path_info)
+        if static_file is None or request.method not in ('GET', 'HEAD'):
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    def serve(self, request, static_file):
+        path, encoding = self.choose_variant(request, static_file)
+        if request.META.get('HTTP_IF_NONE_MATCH') == static_file.etag:
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=static_file.content_type)
+            response['Content-Length'] = os.path.getsize(path)
+        else:
+            response = FileResponse(
+                open(path, 'rb'), content_type=static_file.content_type
+            )
+        if encoding and response.status_code != 304:
+            response['Content-Encoding'] = encoding
+        response['ETag'] = static_file.etag
+        response['Last-Modified'] = static_file.last_modified
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if static_file.immutable
+            else DEFAULT_CACHE_CONTROL
+        )
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+    def choose_variant(self, request, static_file):
+        accepted = ENCODING_SPLIT_RE.split(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        accepted = {value.split(';')[0] for value in accepted}
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in static_file.variants:
+                return static_file.variants[encoding], encoding
+        return static_file.path, None
+
+
+def client_ip(request):
+    """Адрес клиента с учётом RATELIMIT_PROXIES доверенных прокси.
+
+    Каждый прокси дописывает в X-Forwarded-For адрес, от которого
+    получил запрос, поэтому доверять можно только последним записям:
+    всё левее мог подставить сам клиент.
+    """
+    if RATELIMIT_PROXIES:
+        forwarded = [
+            address.strip() for address
+            in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= RATELIMIT_PROXIES:
+            return forwarded[-RATELIMIT_PROXIES]
+    return request.META.get('REMOTE_ADDR')
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к маршрутам из RATELIMITS.
+
+    Действия пользователя считаются по его id, так что смена адреса
+    не обходит лимит, а общий адрес (NAT, офис) не делит лимит между
+    людьми. Гости считаются по адресу клиента (client_ip). Middleware
+    стоит после аутентификации, но раньше CSRF: запрос сверх лимита
+    получает ответ 429 до разбора тела запроса, а гостю без куки
+    сессии отказывают без обращений к базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        scope = request.resolver_match.view_name
+        rule = RATELIMITS.get(scope)
+        if rule is None:
+            return None
+        limit, window, methods = rule
+        if request.method not in methods:
+            return None
+        # Пользователь берётся из кеша (users.cache.get_session_user),
+        # подставная кука сессии даёт гостя и ключ по адресу
+        if request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = f'ip-{client_ip(request)}'
+        retry_after = hit(scope, ident, limit, window)
+        if not retry_after:
+            return None
+        response = HttpResponse(
+            'Слишком много запросов, попробуйте позже',
+            status=429,
+            content_type='text/plain; charset=utf-8'
+        )
+        response['Retry-After'] = retry_after
+        return response
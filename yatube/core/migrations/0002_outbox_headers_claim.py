@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='cc',
+            field=models.TextField(blank=True, verbose_name='Копия'),
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='claim',
+            field=models.CharField(blank=True, help_text='Какой запуск отправки забрал письмо', max_length=32, verbose_name='Метка отправителя'),
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='headers',
+            field=models.TextField(blank=True, help_text='Словарь заголовков в JSON', verbose_name='Дополнительные заголовки'),
+        ),
+        migrations.AddField(
+            model_name='outboxemail',
+            name='reply_to',
+            field=models.TextField(blank=True, verbose_name='Адреса для ответа'),
+        ),
+    ]
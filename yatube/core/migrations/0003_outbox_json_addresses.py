@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:55
+
+import json
+
+from django.db import migrations, models
+
+ADDRESS_FIELDS = ('recipients', 'cc', 'bcc', 'reply_to')
+
+
+def addresses_to_json(apps, schema_editor):
+    """Адреса через запятую становятся списками JSON."""
+    OutboxEmail = apps.get_model('core', 'OutboxEmail')
+    last_id = 0
+    while True:
+        batch = list(
+            OutboxEmail.objects.filter(pk__gt=last_id).order_by('pk').only(
+                *ADDRESS_FIELDS
+            )[:500]
+        )
+        if not batch:
+            return
+        for email in batch:
+            for field in ADDRESS_FIELDS:
+                addresses = [
+                    address for address in getattr(email, field).split(',')
+                    if address
+                ]
+                setattr(
+                    email, field, json.dumps(addresses, ensure_ascii=False)
+                )
+        OutboxEmail.objects.bulk_update(batch, ADDRESS_FIELDS)
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_outbox_headers_claim'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxemail',
+            name='recipients',
+            field=models.TextField(help_text='Список адресов в JSON', verbose_name='Получатели'),
+        ),
+        migrations.RunPython(addresses_to_json, migrations.RunPython.noop),
+    ]
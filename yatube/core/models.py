@@ -0,0 +1,87 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    QUEUED = 'queued'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не доставлено'),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст письма')
+    html_body = models.TextField(blank=True, verbose_name='HTML-версия')
+    from_email = models.CharField(max_length=255, verbose_name='Отправитель')
+    recipients = models.TextField(
+        verbose_name='Получатели',
+        help_text='Список адресов в JSON'
+    )
+    cc = models.TextField(blank=True, verbose_name='Копия')
+    bcc = models.TextField(blank=True, verbose_name='Скрытые получатели')
+    reply_to = models.TextField(blank=True, verbose_name='Адреса для ответа')
+    headers = models.TextField(
+        blank=True,
+        verbose_name='Дополнительные заголовки',
+        help_text='Словарь заголовков в JSON'
+    )
+    dedup_key = models.CharField(
+        max_length=64,
+        verbose_name='Ключ для отсева повторов'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    claim = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Метка отправителя',
+        help_text='Какой запуск отправки забрал письмо'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outbox_status_next_idx'
+            ),
+        ]
+        constraints = [
+            # Одинаковое письмо стоит в очереди только один раз
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=Q(status='queued'),
+                name='unique_queued_email'
+            ),
+        ]
@@ -0,0 +1,85 @@
+"""Счётчики частоты запросов со скользящим окном.
+
+Окно приближается двумя соседними фиксированными окнами: число
+запросов в прошлом окне берётся с весом той его части, что ещё
+попадает в скользящее окно. На проверку приходится одно чтение
+из кеша и один incr. Если кеш недоступен, счётчики временно
+ведутся в памяти процесса.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+RATELIMIT_CACHE_KEY = 'ratelimit:{}:{}:{}'
+# После стольких счётчиков в памяти процесса из них выбрасываются истёкшие
+MAX_LOCAL_COUNTERS = 10000
+
+
+class LocalCounters:
+    """Запасные счётчики в памяти процесса на время недоступности кеша."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def get(self, key):
+        with self.lock:
+            count, expires = self.counters.get(key, (0, 0))
+            return count if expires > time.monotonic() else 0
+
+    def incr(self, key, timeout):
+        with self.lock:
+            now = time.monotonic()
+            count, expires = self.counters.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            self.counters[key] = (count + 1, expires)
+            if len(self.counters) > MAX_LOCAL_COUNTERS:
+                self.counters = {
+                    key: value for key, value in self.counters.items()
+                    if value[1] > now
+                }
+            return count + 1
+
+
+local_counters = LocalCounters()
+
+
+def _cache_incr(key, timeout):
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключ успел истечь между add и incr
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def hit(scope, ident, limit, window, now=None):
+    """Учитывает запрос и проверяет, не превышен ли лимит.
+
+    Возвращает 0, если запрос разрешён, иначе число секунд,
+    через которое стоит повторить попытку. Отклонённые запросы
+    тоже учитываются, чтобы поток повторов не проходил по краям окна.
+    """
+    now = time.time() if now is None else now
+    current = int(now // window)
+    elapsed = now - current * window
+    previous_key = RATELIMIT_CACHE_KEY.format(scope, ident, current - 1)
+    current_key = RATELIMIT_CACHE_KEY.format(scope, ident, current)
+    try:
+        previous = cache.get(previous_key, 0)
+        count = _cache_incr(current_key, window * 2)
+    except Exception:
+        logger.warning('Кеш недоступен, лимиты считаются в памяти процесса')
+        previous = local_counters.get(previous_key)
+        count = local_counters.incr(current_key, window * 2)
+    estimate = previous * (window - elapsed) / window + count
+    if estimate <= limit:
+        return 0
+    return max(1, int(window - elapsed))
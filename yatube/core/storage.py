@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import os
+import posixpath
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Расширения файлов, которые имеет смысл сжимать заранее
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.map', '.xml',
+)
+
+# Префикс временных файлов, в которые пишутся загрузки до подсчёта хеша
+UPLOAD_TEMP_PREFIX = '.upload-'
+# Файл блокировки в корне хранилища картинок
+LOCK_FILE = '.lock'
+
+
+def compress_file(path):
+    """Сохраняет рядом с файлом его .gz и .br версии.
+
+    Сжатая версия сохраняется, только если она меньше исходной.
+    Возвращает список созданных файлов.
+    """
+    with open(path, 'rb') as source:
+        content = source.read()
+    compressors = [('.gz', lambda data: gzip.compress(data, 9))]
+    if brotli is not None:
+        compressors.append(('.br', brotli.compress))
+    created = []
+    for suffix, compress in compressors:
+        compressed = compress(content)
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            created.append(path + suffix)
+    return created
+
+
+class ManifestStaticStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в именах и заранее сжатыми копиями.
+
+    Пока collectstatic не запускался (например, в тестах), для файлов
+    без записи в манифесте отдаются исходные имена вместо ошибки.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                for path in compress_file(self.path(name)):
+                    yield name, os.path.basename(path), True
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит каждый уникальный файл один раз под именем из его хеша.
+
+    Файл posts/meme.jpg сохраняется как posts/ab/cd/abcd…ef.jpg, где
+    abcd…ef — sha256 содержимого, посчитанный при потоковой записи
+    во временный файл. Если такой файл уже есть, повторная загрузка
+    только обновляет время его изменения и возвращает его имя.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    @contextmanager
+    def lock(self):
+        """Межпроцессная блокировка хранилища.
+
+        Под ней сохраняются файлы и проверяется, можно ли их удалить,
+        чтобы удаление не разошлось с повторной загрузкой того же файла.
+        Без fcntl (Windows) блокировка не берётся.
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.location, exist_ok=True)
+        with open(self.path(LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        temp_dir = self.path(directory)
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        temp = tempfile.NamedTemporaryFile(
+            dir=temp_dir, prefix=UPLOAD_TEMP_PREFIX, delete=False
+        )
+        try:
+            with temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+        except BaseException:
+            os.remove(temp.name)
+            raise
+        hexdigest = digest.hexdigest()
+        name = posixpath.join(
+            directory, hexdigest[:2], hexdigest[2:4], hexdigest + extension
+        )
+        full_path = self.path(name)
+        with self.lock():
+            try:
+                # По времени изменения удаление узнаёт только что
+                # загруженные файлы, даже если они совпали со старыми
+                os.utime(full_path)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temp.name, full_path)
+                os.chmod(full_path, self.file_permissions_mode or 0o644)
+            else:
+                os.remove(temp.name)
+        return name
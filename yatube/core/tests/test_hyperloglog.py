@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from core.hyperloglog import HyperLogLog
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_estimate_close_to_exact(self):
+        """Оценка числа уникальных значений близка к точному."""
+        for exact in (5, 1000, 50000):
+            sketch = HyperLogLog(12)
+            for number in range(exact):
+                sketch.add(f'visitor{number}')
+                sketch.add(f'visitor{number}')
+            with self.subTest(exact=exact):
+                self.assertAlmostEqual(
+                    sketch.count(), exact, delta=exact * 0.05 + 1
+                )
+
+    def test_merge_and_serialize(self):
+        """Объединение скетчей переживает сохранение в байты."""
+        first, second = HyperLogLog(10), HyperLogLog(10)
+        for number in range(300):
+            first.add(str(number))
+            second.add(str(number + 150))
+        restored = HyperLogLog.from_bytes(first.to_bytes(), 10)
+        restored.merge(second)
+        self.assertAlmostEqual(restored.count(), 450, delta=25)
+        self.assertLess(len(first.to_bytes()), 1024)
@@ -0,0 +1,193 @@
+import smtplib
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import mail as outbox
+from core.models import OutboxEmail
+
+User = get_user_model()
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPRecipientsRefused({
+            'a@yatube.ru': (550, b'No such user')
+        })
+
+
+class DisconnectedBackend(EmailBackend):
+    closed = 0
+
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+    def close(self):
+        self.closed += 1
+
+
+@override_settings(EMAIL_BACKEND='core.mail.QueuedEmailBackend')
+@mock.patch(
+    'core.management.commands.send_queued_mail.OUTBOX_DELIVERY_BACKEND',
+    LOCMEM_BACKEND
+)
+class OutboxTests(TestCase):
+    def send_queued_mail(self):
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        return out.getvalue()
+
+    def test_password_reset_is_queued(self):
+        """Письмо сброса пароля ставится в очередь, а не отправляется."""
+        User.objects.create_user(
+            username='NoName', email='noname@yatube.ru', password='secret'
+        )
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'noname@yatube.ru'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            OutboxEmail.objects.filter(
+                recipients='["noname@yatube.ru"]'
+            ).count(),
+            1
+        )
+        output = self.send_queued_mail()
+        self.assertIn('Отправлено: 1', output)
+        self.assertEqual(mail.outbox[0].to, ['noname@yatube.ru'])
+
+    def test_duplicates_are_dropped(self):
+        """Одинаковое письмо стоит в очереди один раз."""
+        for _ in range(2):
+            mail.send_mail(
+                'Тема', 'Текст', 'yatube@yatube.ru', ['noname@yatube.ru']
+            )
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_html_and_bcc_preserved(self):
+        """HTML-версия и скрытые получатели доходят до отправки."""
+        message = EmailMultiAlternatives(
+            'Тема', 'Текст', 'yatube@yatube.ru', ['noname@yatube.ru'],
+            bcc=['archive@yatube.ru']
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.send()
+        self.send_queued_mail()
+        delivered = mail.outbox[0]
+        self.assertEqual(delivered.bcc, ['archive@yatube.ru'])
+        self.assertEqual(delivered.alternatives[0][0], '<p>Текст</p>')
+
+    def test_cc_reply_to_and_headers_preserved(self):
+        """Копия, адреса для ответа и заголовки доходят до отправки."""
+        EmailMultiAlternatives(
+            'Тема', 'Текст', 'yatube@yatube.ru', ['noname@yatube.ru'],
+            cc=['copy@yatube.ru'], reply_to=['support@yatube.ru'],
+            headers={'List-Unsubscribe': '<https://yatube.ru/unsubscribe/>'}
+        ).send()
+        self.send_queued_mail()
+        delivered = mail.outbox[0]
+        self.assertEqual(delivered.to, ['noname@yatube.ru'])
+        self.assertEqual(delivered.cc, ['copy@yatube.ru'])
+        self.assertEqual(delivered.reply_to, ['support@yatube.ru'])
+        self.assertEqual(
+            delivered.extra_headers['List-Unsubscribe'],
+            '<https://yatube.ru/unsubscribe/>'
+        )
+
+    def test_display_name_with_comma_preserved(self):
+        """Имя получателя с запятой не разбивается на два адреса."""
+        mail.send_mail(
+            'Тема', 'Текст', 'yatube@yatube.ru',
+            ['"Doe, John" <john@yatube.ru>', 'a@yatube.ru']
+        )
+        self.send_queued_mail()
+        self.assertEqual(
+            mail.outbox[0].to, ['"Doe, John" <john@yatube.ru>', 'a@yatube.ru']
+        )
+
+    def test_disconnect_does_not_spend_attempts(self):
+        """Обрыв соединения откладывает пачку, не тратя попытки писем."""
+        for number in range(2):
+            mail.send_mail(
+                'Тема', 'Текст', 'yatube@yatube.ru', [f'{number}@yatube.ru']
+            )
+        connection = DisconnectedBackend()
+        with self.assertLogs('core.mail', 'WARNING'):
+            counters = outbox.deliver_batch(connection)
+        self.assertEqual(counters['deferred'], 2)
+        self.assertEqual(connection.closed, 1)
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.attempts, 0)
+            self.assertEqual(email.status, OutboxEmail.QUEUED)
+            self.assertEqual(email.claim, '')
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+    def test_attachments_rejected(self):
+        """Письмо с вложением не ставится в очередь без вложения."""
+        message = EmailMultiAlternatives(
+            'Тема', 'Текст', 'yatube@yatube.ru', ['noname@yatube.ru']
+        )
+        message.attach('report.txt', 'Отчёт', 'text/plain')
+        with self.assertRaises(ValueError):
+            message.send()
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_claimed_emails_not_claimed_again(self):
+        """Забранное письмо не достаётся второй отправке."""
+        for number in range(3):
+            mail.send_mail(
+                'Тема', 'Текст', 'yatube@yatube.ru', [f'{number}@yatube.ru']
+            )
+        first = outbox.claim_batch(2)
+        second = outbox.claim_batch(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(
+            {email.pk for email in first} & {email.pk for email in second}
+        )
+        self.assertEqual(outbox.claim_batch(2), [])
+
+    def test_expired_claim_returns_to_queue(self):
+        """Письмо, отправка которого прервалась, снова уходит в очередь."""
+        mail.send_mail('Тема', 'Текст', 'yatube@yatube.ru', ['a@yatube.ru'])
+        outbox.claim_batch()
+        self.assertEqual(
+            outbox.deliver_batch(get_connection(LOCMEM_BACKEND))['sent'], 0
+        )
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(
+            outbox.deliver_batch(get_connection(LOCMEM_BACKEND))['sent'], 1
+        )
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.SENT)
+        self.assertEqual(email.claim, '')
+
+    def test_failed_delivery_retried(self):
+        """Неудачная отправка откладывается, а затем помечается ошибкой."""
+        mail.send_mail('Тема', 'Текст', 'yatube@yatube.ru', ['a@yatube.ru'])
+        connection = FailingBackend()
+        with mock.patch.object(outbox, 'OUTBOX_MAX_ATTEMPTS', 2):
+            counters = outbox.deliver_batch(connection)
+            self.assertEqual(counters['retried'], 1)
+            email = OutboxEmail.objects.get()
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertEqual(outbox.deliver_batch(connection)['retried'], 0)
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            with self.assertLogs('core.mail', 'ERROR'):
+                counters = outbox.deliver_batch(connection)
+            self.assertEqual(counters['failed'], 1)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.FAILED)
+        self.assertEqual(
+            outbox.deliver_batch(get_connection(LOCMEM_BACKEND))['sent'], 0
+        )
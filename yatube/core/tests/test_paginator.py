@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.test import RequestFactory, TestCase
+
+from core.utils import add_paginator, elided_page_range
+
+
+class ElidedPageRangeTests(TestCase):
+    def page_range(self, num_pages, number):
+        return elided_page_range(Paginator(range(num_pages), 1).page(number))
+
+    def test_short_range_not_elided(self):
+        """Немного страниц показываются полностью."""
+        self.assertEqual(self.page_range(5, 3), [1, 2, 3, 4, 5])
+
+    def test_long_range_elided(self):
+        """Длинный список сокращается до краёв и окна вокруг текущей."""
+        cases = {
+            1: [1, 2, 3, None, 100000],
+            50000: [1, None, 49998, 49999, 50000, 50001, 50002, None, 100000],
+            100000: [1, None, 99998, 99999, 100000],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(self.page_range(100000, number), expected)
+
+    def test_single_page_gap_not_elided(self):
+        """Пропуск не скрывает одну-единственную страницу."""
+        self.assertEqual(self.page_range(20, 5)[:2], [1, 2])
+
+    def test_add_paginator_sets_range(self):
+        """add_paginator добавляет к странице сокращённый список."""
+        request = RequestFactory().get('/', {'page': 7})
+        page_obj = add_paginator(request, range(1000), 10)
+        self.assertEqual(
+            page_obj.elided_page_range, [1, None, 5, 6, 7, 8, 9, None, 100]
+        )
+
+    def test_benchmark_command(self):
+        """Размер навигации не растёт с числом страниц."""
+        out = StringIO()
+        call_command(
+            'benchmark_paginator', '--pages', '100', '10000', '--repeat', '1',
+            stdout=out
+        )
+        sizes = [
+            line.split(',')[-1] for line in out.getvalue().splitlines()
+            if 'сокращённый' in line
+        ]
+        self.assertEqual(len(sizes), 2)
+        self.assertLess(
+            abs(int(sizes[0].split()[-2]) - int(sizes[1].split()[-2])), 100
+        )
@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import middleware, ratelimit
+
+User = get_user_model()
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_limit_within_window(self):
+        """Запросы сверх лимита в пределах окна отклоняются."""
+        for _ in range(3):
+            self.assertEqual(ratelimit.hit('scope', 'ip', 3, 60, now=600), 0)
+        self.assertEqual(ratelimit.hit('scope', 'ip', 3, 60, now=610), 50)
+
+    def test_previous_window_counts_partially(self):
+        """Прошлое окно учитывается пропорционально перекрытию."""
+        for _ in range(4):
+            ratelimit.hit('scope', 'ip', 4, 60, now=650)
+        # В начале следующего окна прошлые запросы ещё почти все в силе
+        self.assertTrue(ratelimit.hit('scope', 'ip', 4, 60, now=661))
+        # Ближе к концу окна их вес почти исчез
+        self.assertEqual(ratelimit.hit('scope', 'ip', 4, 60, now=715), 0)
+
+    def test_local_fallback(self):
+        """Без кеша счётчики ведутся в памяти процесса."""
+        with mock.patch.object(ratelimit, 'cache') as broken_cache:
+            broken_cache.get.side_effect = ConnectionError
+            with self.assertLogs('core.ratelimit', 'WARNING'):
+                self.assertEqual(
+                    ratelimit.hit('fallback', 'ip', 1, 60, now=600), 0
+                )
+                self.assertTrue(
+                    ratelimit.hit('fallback', 'ip', 1, 60, now=601)
+                )
+
+
+@mock.patch.dict(middleware.RATELIMITS, {
+    'posts:profile_follow': (2, 60, ('GET',)),
+    'users:signup': (1, 60, ('POST',)),
+})
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.author = User.objects.create_user(username='Author')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_user_limited_by_id(self):
+        """Лимит пользователя общий для всех его адресов."""
+        url = reverse('posts:profile_follow', args=[self.author.username])
+        for _ in range(2):
+            self.assertEqual(self.authorized_client.get(url).status_code, 302)
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        moved_client = Client(REMOTE_ADDR='10.0.0.2')
+        moved_client.force_login(self.user)
+        self.assertEqual(moved_client.get(url).status_code, 429)
+        # Другой пользователь с того же адреса в лимит не упирается
+        neighbour_client = Client()
+        neighbour_client.force_login(self.author)
+        self.assertEqual(neighbour_client.get(url).status_code, 302)
+
+    def test_guest_limited_by_address(self):
+        """Гости считаются по адресу клиента."""
+        url = reverse('users:signup')
+        self.client.post(url, {})
+        self.assertEqual(self.client.post(url, {}).status_code, 429)
+        other_client = Client(REMOTE_ADDR='10.0.0.2')
+        self.assertNotEqual(other_client.post(url, {}).status_code, 429)
+
+    @mock.patch.object(middleware, 'RATELIMIT_PROXIES', 1)
+    def test_address_behind_proxy(self):
+        """За прокси адрес гостя берётся из его записи в X-Forwarded-For."""
+        url = reverse('users:signup')
+        proxied = {'REMOTE_ADDR': '10.0.0.1'}
+        self.client.post(
+            url, {}, HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2', **proxied
+        )
+        response = self.client.post(
+            url, {}, HTTP_X_FORWARDED_FOR='3.3.3.3, 2.2.2.2', **proxied
+        )
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            url, {}, HTTP_X_FORWARDED_FOR='2.2.2.3', **proxied
+        )
+        self.assertNotEqual(response.status_code, 429)
+
+    def test_rejected_before_csrf(self):
+        """Лимит проверяется раньше CSRF, тело запроса не разбирается."""
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('users:signup')
+        client.post(url, {})
+        with mock.patch(
+            'django.http.request.HttpRequest._load_post_and_files'
+        ) as load_post:
+            response = client.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        load_post.assert_not_called()
+
+    def test_guest_rejected_without_queries(self):
+        """Гостю сверх лимита отказывают, не обращаясь к базе."""
+        url = reverse('users:signup')
+        self.client.post(url, {})
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
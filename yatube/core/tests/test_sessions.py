@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.checks import check_session_cache
+
+User = get_user_model()
+
+
+def session_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if 'django_session' in query['sql']
+    ]
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_guest_gets_no_session(self):
+        """Гостю не создаётся сессия и таблица сессий не читается."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(session_queries(queries), [])
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_user_session_read_from_cache(self):
+        """Сессия пользователя читается из кеша, а не из базы."""
+        user = User.objects.create_user(username='NoName')
+        client = Client()
+        client.force_login(user)
+        client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('posts:follow_index'))
+        self.assertEqual(session_queries(queries), [])
+
+    def test_purge_expired_sessions(self):
+        """Команда удаляет пачками только истёкшие сессии."""
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}',
+                session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key='active',
+            session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        out = StringIO()
+        call_command('purge_expired_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('5', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('pk', flat=True)), ['active']
+        )
+
+    def test_purge_rejects_oversized_batch(self):
+        """Пачка не может превышать лимит параметров SQLite."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'purge_expired_sessions', '--batch-size', '1000',
+                stdout=StringIO()
+            )
+
+
+class SessionCacheCheckTests(TestCase):
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/yatube-check',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_session_cache(None), [])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_process_local_cache_warns(self):
+        """Сессии в кеше отдельного процесса дают предупреждение."""
+        self.assertEqual(
+            [warning.id for warning in check_session_cache(None)],
+            ['core.W001']
+        )
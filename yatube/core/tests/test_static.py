@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+from core.storage import compress_file
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = b'body { color: red; }\n' * 100
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticFilesMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_STATIC_ROOT, 'css'))
+        for name in ('css/main.css', 'css/main.0123456789ab.css'):
+            path = os.path.join(TEMP_STATIC_ROOT, name)
+            with open(path, 'wb') as css:
+                css.write(CSS)
+        compress_file(
+            os.path.join(TEMP_STATIC_ROOT, 'css/main.0123456789ab.css'))
+        manifest = {'paths': {'css/main.css': 'css/main.0123456789ab.css'}}
+        with open(os.path.join(TEMP_STATIC_ROOT, 'staticfiles.json'),
+                  'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse('view')
+        )
+
+    def test_hashed_file_cached_forever(self):
+        """Файлы с хешем в имени отдаются с кешированием на год."""
+        request = self.factory.get('/static/css/main.0123456789ab.css')
+        response = self.middleware(request)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(b''.join(response.streaming_content), CSS)
+
+    def test_unhashed_file_short_cache(self):
+        """Файлы без хеша кешируются ненадолго."""
+        response = self.middleware(self.factory.get('/static/css/main.css'))
+        self.assertNotEqual(
+            response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+    def test_precompressed_variant(self):
+        """При поддержке gzip отдаётся заранее сжатая копия."""
+        request = self.factory.get(
+            '/static/css/main.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), CSS)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        url = '/static/css/main.css'
+        etag = self.middleware(self.factory.get(url))['ETag']
+        response = self.middleware(
+            self.factory.get(url, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_passed_to_views(self):
+        """Остальные запросы проходят к представлениям."""
+        response = self.middleware(self.factory.get('/static/missing.css'))
+        self.assertEqual(response.content, b'view')
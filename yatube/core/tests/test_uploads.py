@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import uploadhandlers
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_png(size):
+    buffer = BytesIO()
+    Image.new('1', size).save(buffer, 'PNG')
+    return SimpleUploadedFile(
+        name='picture.png', content=buffer.getvalue(),
+        content_type='image/png'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LimitedUploadHandlerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(LimitedUploadHandlerTests.user)
+
+    def create_post(self, image, url=None):
+        return self.authorized_client.post(
+            url or reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def test_small_image_accepted(self):
+        """Картинка в пределах ограничений сохраняется."""
+        response = self.create_post(make_png((20, 20)))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.get().image)
+
+    def test_too_many_pixels_rejected(self):
+        """Картинка с огромным числом пикселей отклоняется по заголовку."""
+        with mock.patch.object(uploadhandlers, 'UPLOAD_MAX_PIXELS', 100):
+            response = self.create_post(make_png((20, 20)))
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка слишком большая')
+        self.assertFalse(Post.objects.exists())
+
+    def test_too_large_file_rejected(self):
+        """Слишком большой файл отклоняется, не дожидаясь конца загрузки."""
+        with mock.patch.object(uploadhandlers, 'UPLOAD_MAX_BYTES', 10):
+            response = self.create_post(make_png((20, 20)))
+        self.assertFormError(
+            response, 'form', 'image', 'Размер файла превышает допустимый')
+
+    def test_upload_progress_reported(self):
+        """Ход загрузки доступен по X-Progress-ID."""
+        url = reverse('posts:post_create') + '?X-Progress-ID=abc'
+        self.create_post(make_png((20, 20)), url=url)
+        response = self.authorized_client.get(
+            reverse('upload_progress'), {'X-Progress-ID': 'abc'})
+        progress = response.json()
+        self.assertTrue(progress['done'])
+        self.assertEqual(progress['received'], progress['size'])
+
+    def test_oversized_upload_drains_body(self):
+        """После отказа остаток тела дочитывается, соединение не рвётся."""
+        with mock.patch.object(uploadhandlers, 'UPLOAD_MAX_BYTES', 10):
+            with mock.patch(
+                'django.http.multipartparser.exhaust'
+            ) as exhaust:
+                response = self.create_post(make_png((20, 20)))
+        exhaust.assert_called_once()
+        self.assertFormError(
+            response, 'form', 'image', 'Размер файла превышает допустимый')
+
+    def test_progress_writes_throttled(self):
+        """Ход загрузки пишется в кеш не на каждый фрагмент."""
+        url = reverse('posts:post_create') + '?X-Progress-ID=abc'
+        # Шум почти не сжимается: файл около мегабайта, это много фрагментов
+        buffer = BytesIO()
+        Image.frombytes('L', (1000, 1000), os.urandom(10 ** 6)).save(
+            buffer, 'PNG'
+        )
+        image = SimpleUploadedFile(
+            name='noise.png', content=buffer.getvalue(),
+            content_type='image/png'
+        )
+        with mock.patch.object(uploadhandlers, 'cache') as progress_cache:
+            with mock.patch.object(uploadhandlers, 'PROGRESS_STEP', 0.5):
+                self.create_post(image, url=url)
+        # Начало, не больше двух шагов по половине запроса и завершение
+        self.assertLessEqual(progress_cache.set.call_count, 4)
+        self.assertTrue(progress_cache.set.call_args[0][1]['done'])
+
+    def test_invalid_progress_id_rejected(self):
+        """Недопустимый X-Progress-ID не попадает в ключ кеша."""
+        response = self.authorized_client.get(
+            reverse('upload_progress'), {'X-Progress-ID': 'a b:c' * 20})
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(uploadhandlers.upload_progress_key(1, 'a\nb'))
+
+    def test_upload_progress_private(self):
+        """Чужой и анонимный запрос не видят хода загрузки."""
+        url = reverse('posts:post_create') + '?X-Progress-ID=abc'
+        self.create_post(make_png((20, 20)), url=url)
+        other = Client()
+        other.force_login(User.objects.create_user(username='Other'))
+        response = other.get(
+            reverse('upload_progress'), {'X-Progress-ID': 'abc'})
+        self.assertEqual(response.json(), {})
+        response = Client().get(
+            reverse('upload_progress'), {'X-Progress-ID': 'abc'})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,145 @@
+import re
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler
+)
+from PIL import Image
+
+from yatube.settings import UPLOAD_MAX_BYTES, UPLOAD_MAX_PIXELS
+
+# Сколько первых байт файла держать в памяти для чтения заголовка картинки
+HEADER_BYTES = 64 * 1024
+PROGRESS_CACHE_KEY = 'upload_progress:{}:{}'
+PROGRESS_CACHE_TIMEOUT = 60 * 5
+# X-Progress-ID приходит от клиента и попадает в ключ кеша
+PROGRESS_ID_RE = re.compile(r'[A-Za-z0-9-]{1,64}')
+# Ход загрузки пишется в кеш не чаще, чем при продвижении на такую долю
+# запроса или по прошествии стольких секунд
+PROGRESS_STEP = 0.05
+PROGRESS_INTERVAL = 1
+
+
+def upload_progress_key(user_id, progress_id):
+    """Ключ кеша хода загрузки; None, если X-Progress-ID недопустим."""
+    if not PROGRESS_ID_RE.fullmatch(progress_id):
+        return None
+    # Ключ привязан к пользователю: чужой X-Progress-ID ничего не покажет
+    return PROGRESS_CACHE_KEY.format(user_id, progress_id)
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузки сразу во временный файл и отклоняет их как можно раньше.
+
+    Файл отбрасывается, как только превышен UPLOAD_MAX_BYTES или из
+    заголовка картинки видно, что в ней больше UPLOAD_MAX_PIXELS пикселей.
+    Картинка при этом не декодируется, а остаток тела запроса
+    пропускается без записи на диск. Причина отказа сохраняется
+    в request.upload_errors, чтобы представление показало её в форме.
+    Если вошедший пользователь передал X-Progress-ID, ход загрузки
+    пишется в кеш каждые PROGRESS_STEP запроса или PROGRESS_INTERVAL
+    секунд.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.progress_key = None
+        if request is not None:
+            request.upload_errors = {}
+            progress_id = request.GET.get('X-Progress-ID')
+            if progress_id and request.user.is_authenticated:
+                self.progress_key = upload_progress_key(
+                    request.user.pk, progress_id
+                )
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        self.request_length = content_length
+        self.received = 0
+        self.reported = None
+        self.report_progress()
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.header = b''
+        self.header_checked = False
+        # Кроме файла в теле запроса есть обычные поля формы
+        max_request_size = (
+            UPLOAD_MAX_BYTES + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        )
+        if self.request_length > max_request_size:
+            self.reject('Размер файла превышает допустимый')
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        self.report_progress()
+        if start + len(raw_data) > UPLOAD_MAX_BYTES:
+            self.reject('Размер файла превышает допустимый')
+        if not self.header_checked:
+            self.header += raw_data[:HEADER_BYTES - len(self.header)]
+            self.check_header(final=len(self.header) >= HEADER_BYTES)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.header_checked:
+            try:
+                self.check_header(final=True)
+            except StopUpload:
+                # Файл уже получен целиком, остаётся только его отбросить
+                self.file.close()
+                return None
+        return super().file_complete(file_size)
+
+    def check_header(self, final):
+        """Проверяет размеры картинки по уже полученному началу файла.
+
+        Пока заголовок не удаётся прочитать, проверка откладывается
+        до следующего фрагмента; файлы, которые не распознаются как
+        картинки, оставляются для проверки формой.
+        """
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.reject('Картинка слишком большая')
+        except Exception:
+            self.header_checked = final
+            return
+        self.header_checked = True
+        if width * height > UPLOAD_MAX_PIXELS:
+            self.reject('Картинка слишком большая')
+
+    def reject(self, message):
+        if self.request is not None:
+            self.request.upload_errors[self.field_name] = message
+        # Остаток тела запроса дочитывается без сохранения: при сбросе
+        # соединения браузер не получил бы страницу с ошибкой формы
+        raise StopUpload(connection_reset=False)
+
+    def report_progress(self, done=False):
+        if not self.progress_key:
+            return
+        now = time.monotonic()
+        if not done and self.reported is not None:
+            received, reported_at = self.reported
+            step = (self.received - received) / max(self.request_length, 1)
+            if step < PROGRESS_STEP and now - reported_at < PROGRESS_INTERVAL:
+                return
+        self.reported = (self.received, now)
+        cache.set(
+            self.progress_key,
+            {
+                'received': self.received,
+                'size': self.request_length,
+                'done': done,
+            },
+            PROGRESS_CACHE_TIMEOUT
+        )
+
+    def upload_complete(self):
+        # Счётчик учитывает только байты файлов, а не всего тела запроса
+        self.received = self.request_length
+        self.report_progress(done=True)
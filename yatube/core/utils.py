@@ -1,8 +1,45 @@
 from django.core.paginator import Paginator
 
 
+def elided_page_range(page, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации без полного списка страниц.
+
+    Остаются первые и последние on_ends страниц и по on_each_side
+    страниц вокруг текущей, пропуски обозначаются None. Длина списка
+    не зависит от общего числа страниц.
+    """
+    num_pages = page.paginator.num_pages
+    number = page.number
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    window_start = max(number - on_each_side, 1)
+    window_end = min(number + on_each_side, num_pages)
+    # Пропуск ставится, только если он скрывает больше одной страницы
+    if window_start > on_ends + 2:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(None)
+    else:
+        window_start = 1
+    if window_end < num_pages - on_ends - 1:
+        pages.extend(range(window_start, window_end + 1))
+        pages.append(None)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(window_start, num_pages + 1))
+    return pages
+
+
 def add_paginator(request, obj_list, number_of_obj):
     paginator = Paginator(obj_list, number_of_obj)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.elided_page_range = elided_page_range(page_obj)
     return page_obj
+
+
+def add_upload_errors(request, form):
+    """Переносит в форму ошибки, найденные обработчиком загрузки файлов."""
+    for field, error in getattr(request, 'upload_errors', {}).items():
+        if field in form.fields:
+            form.add_error(field, error)
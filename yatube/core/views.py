@@ -1,5 +1,9 @@
+from django.core.cache import cache
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .uploadhandlers import upload_progress_key
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -7,3 +11,16 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def upload_progress(request):
+    """Ход загрузки файла текущего пользователя с переданным X-Progress-ID."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Нужно войти'}, status=403)
+    progress_id = request.GET.get('X-Progress-ID')
+    if not progress_id:
+        return JsonResponse({'error': 'Не передан X-Progress-ID'}, status=400)
+    key = upload_progress_key(request.user.pk, progress_id)
+    if key is None:
+        return JsonResponse({'error': 'Неверный X-Progress-ID'}, status=400)
+    return JsonResponse(cache.get(key) or {})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, Group
+from .models import Mention, Post, Group, PostViewStats, Tag
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,3 +12,39 @@ class PostAdmin(admin.ModelAdmin):
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+
+
+class PostViewStatsAdmin(admin.ModelAdmin):
+    list_display = ('post', 'views', 'unique_visitors')
+    list_select_related = ('post',)
+    readonly_fields = ('post', 'views', 'unique_visitors')
+    exclude = ('visitors',)
+    ordering = ('-views',)
+
+    def unique_visitors(self, obj):
+        return obj.unique_visitors
+    unique_visitors.short_description = 'Уникальных читателей (оценка)'
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(PostViewStats, PostViewStatsAdmin)
+
+
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+admin.site.register(Tag, TagAdmin)
+
+
+class MentionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author', 'post', 'created', 'is_read')
+    list_select_related = ('user', 'author')
+    list_filter = ('is_read',)
+    raw_id_fields = ('user', 'author', 'post', 'comment')
+
+
+admin.site.register(Mention, MentionAdmin)
@@ -0,0 +1,74 @@
+"""Архив постов по месяцам.
+
+Посты месяца выбираются диапазоном по pub_date, который покрывается
+индексами. Календарь с числом постов по месяцам строится из сводной
+статистики по дням (posts.rollups) и кешируется до следующего
+пересчёта сводки.
+"""
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.http import Http404
+from django.utils import timezone
+
+from yatube.settings import ARCHIVE_CALENDAR_TIMEOUT
+
+CALENDAR_CACHE_KEY = 'posts:calendar:{}:{}'
+CALENDAR_VERSION_KEY = 'posts:calendar_version'
+
+
+def month_bounds(year, month):
+    """Начало месяца и начало следующего в текущем часовом поясе."""
+    if not 1 <= month <= 12 or not 1 <= year <= 9998:
+        raise Http404('Такого месяца нет')
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime(year, month, 1), tz)
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    end = timezone.make_aware(datetime(next_year, next_month, 1), tz)
+    return start, end
+
+
+def month_posts(posts, year, month):
+    """Посты месяца из переданного набора, от новых к старым."""
+    start, end = month_bounds(year, month)
+    return posts.filter(pub_date__gte=start, pub_date__lt=end)
+
+
+def get_calendar(scope, daily_stats):
+    """Годы и месяцы с числом постов по строкам сводной статистики.
+
+    Возвращает список {'year': год, 'months': [(месяц, число), ...]}
+    от новых лет к старым, в каждом году все 12 месяцев.
+    """
+    version = cache.get(CALENDAR_VERSION_KEY, 0)
+    key = CALENDAR_CACHE_KEY.format(version, scope)
+    calendar = cache.get(key)
+    if calendar is None:
+        counts = {
+            (row['month'].year, row['month'].month): row['total']
+            for row in daily_stats.annotate(
+                month=TruncMonth('day')
+            ).values('month').annotate(total=Sum('posts')).order_by()
+            if row['total']
+        }
+        calendar = [
+            {
+                'year': year,
+                'months': [
+                    (month, counts.get((year, month), 0))
+                    for month in range(1, 13)
+                ],
+            }
+            for year in sorted({year for year, _ in counts}, reverse=True)
+        ]
+        cache.set(key, calendar, ARCHIVE_CALENDAR_TIMEOUT)
+    return calendar
+
+
+def invalidate_calendars():
+    """Сбрасывает все календари после пересчёта сводной статистики."""
+    cache.set(
+        CALENDAR_VERSION_KEY, cache.get(CALENDAR_VERSION_KEY, 0) + 1, None
+    )
@@ -0,0 +1,120 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404
+
+from users.cache import get_user_by_id
+from yatube.settings import (
+    POST_CACHE_TIMEOUT, MISSING_POST_CACHE_TIMEOUT, GROUP_CACHE_TIMEOUT
+)
+from .models import Post, Group
+
+POST_CACHE_KEY = 'posts:post:{}'
+GROUP_CACHE_KEY = 'posts:group:{}'
+GROUP_ID_CACHE_KEY = 'posts:group_id:{}'
+GROUP_INDEX_CACHE_KEY = 'posts:group_index'
+
+# Отметка в кеше для id, по которым поста в базе нет
+MISSING = 'missing'
+
+
+def get_post(post_id):
+    """Возвращает пост из кеша, при промахе читает его из базы.
+
+    В кеше лежит только строка поста. Автор и сообщество берутся
+    из своих кешей, которые сбрасываются при их изменении, поэтому
+    пост не показывает устаревшее имя автора или название сообщества.
+    Отсутствующие id тоже кешируются (на меньший срок), чтобы перебор
+    несуществующих адресов не нагружал базу. Если поста нет, вернёт None.
+    """
+    key = POST_CACHE_KEY.format(post_id)
+    post = cache.get(key)
+    if post is None:
+        try:
+            post = Post.objects.get(pk=post_id)
+        except Post.DoesNotExist:
+            cache.set(key, MISSING, MISSING_POST_CACHE_TIMEOUT)
+            return None
+        cache.set(key, post, POST_CACHE_TIMEOUT)
+    elif post == MISSING:
+        return None
+    author = get_user_by_id(post.author_id)
+    if author is None:
+        return None
+    post.author = author
+    if post.group_id is not None:
+        # Удаление сообщества обнуляет group_id постов в обход сигналов
+        post.group = get_group_by_id(post.group_id)
+    return post
+
+
+def get_post_or_404(post_id):
+    """Аналог get_object_or_404 для закешированных постов."""
+    post = get_post(post_id)
+    if post is None:
+        raise Http404(f'Пост с id {post_id} не найден')
+    return post
+
+
+def invalidate_post(post_id):
+    """Удаляет пост из кеша."""
+    cache.delete(POST_CACHE_KEY.format(post_id))
+
+
+def _group_key(slug):
+    # Слаг из адреса может содержать любые символы, а memcached
+    # принимает ключи только из ASCII без пробелов
+    return GROUP_CACHE_KEY.format(hashlib.md5(slug.encode()).hexdigest())
+
+
+def get_group_or_404(slug):
+    """Возвращает сообщество по слагу из кеша или из базы."""
+    key = _group_key(slug)
+    group = cache.get(key)
+    if group is None:
+        try:
+            group = Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise Http404(f'Сообщество {slug} не найдено')
+        cache.set(key, group, GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def get_group_by_id(group_id):
+    """Сообщество по id из кеша или из базы; None, если его нет."""
+    key = GROUP_ID_CACHE_KEY.format(group_id)
+    group = cache.get(key)
+    if group is None:
+        group = Group.objects.filter(pk=group_id).first()
+        if group is None:
+            return None
+        cache.set(key, group, GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def invalidate_group(slug, group_id=None):
+    """Удаляет сообщество из кеша по слагу и, если передан, по id."""
+    keys = [_group_key(slug)]
+    if group_id is not None:
+        keys.append(GROUP_ID_CACHE_KEY.format(group_id))
+    cache.delete_many(keys)
+
+
+def get_group_index():
+    """Список сообществ с числом постов и датой последнего поста."""
+    groups = cache.get(GROUP_INDEX_CACHE_KEY)
+    if groups is None:
+        groups = list(
+            Group.objects.annotate(
+                posts_count=Count('posts'),
+                last_post_date=Max('posts__pub_date'),
+            ).order_by('title')
+        )
+        cache.set(GROUP_INDEX_CACHE_KEY, groups, GROUP_CACHE_TIMEOUT)
+    return groups
+
+
+def invalidate_group_index():
+    """Сбрасывает закешированный список сообществ."""
+    cache.delete(GROUP_INDEX_CACHE_KEY)
@@ -0,0 +1,139 @@
+"""Рассылка подписчикам новых постов их авторов.
+
+Подписчики обходятся пачками по id. Для пачки все пары «подписчик —
+новый пост» читаются одним запросом через Follow и Post и разбиваются
+на письма без запросов на каждого подписчика. Шаблон письма
+компилируется один раз, письма передаются почтовому движку пачками.
+Каждая пачка фиксируется вместе с продвижением DigestRun.last_user_id,
+поэтому прерванная рассылка продолжается с того же подписчика.
+
+Граница рассылки — id поста. Id выдаются при вставке, а видны посты
+после коммита, поэтому пост с меньшим id может появиться уже после
+того, как граница ушла дальше него. Чтобы этого не случилось,
+рассылка доходит только до постов старше DIGEST_LAG секунд
+и останавливается перед первым более свежим. Пост, чья транзакция
+длилась дольше DIGEST_LAG, в рассылки не попадёт.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Max, Min
+from django.template.loader import get_template
+from django.utils import timezone
+
+from yatube.settings import (
+    DIGEST_FIRST_PERIOD, DIGEST_LAG, DIGEST_MAX_POSTS, DIGEST_SUBJECT,
+    SITE_URL
+)
+from .models import DigestRun, Follow, Post
+
+DIGEST_TEMPLATE = 'posts/email/digest.txt'
+DIGEST_FIELDS = (
+    'user_id', 'user__email', 'user__username', 'author__username',
+    'author__posts__id', 'author__posts__text', 'author__posts__pub_date',
+)
+
+
+def _run_follows(run):
+    return Follow.objects.filter(
+        author__posts__id__gt=run.after_post_id,
+        author__posts__id__lte=run.last_post_id,
+        user__is_active=True,
+    ).exclude(user__email='')
+
+
+def next_subscribers(run, chunk_size):
+    """Id следующих chunk_size подписчиков рассылки после last_user_id."""
+    return list(
+        _run_follows(run).filter(user_id__gt=run.last_user_id).order_by(
+            'user_id'
+        ).values_list('user_id', flat=True).distinct()[:chunk_size]
+    )
+
+
+def digest_rows(run, user_ids):
+    """Пары «подписчик — новый пост» для пачки подписчиков одним запросом."""
+    return list(
+        _run_follows(run).filter(user_id__in=user_ids).order_by(
+            'user_id', '-author__posts__pub_date'
+        ).values_list(*DIGEST_FIELDS)
+    )
+
+
+def build_digests(rows):
+    """Собирает из отсортированных по подписчику строк по письму на него.
+
+    Выдаёт пары (id подписчика, письмо).
+    """
+    template = get_template(DIGEST_TEMPLATE)
+    for user_id, user_rows in groupby(rows, key=lambda row: row[0]):
+        user_rows = list(user_rows)
+        _, email, username = user_rows[0][:3]
+        posts = [
+            {'author': author, 'id': post_id, 'text': text, 'pub_date': date}
+            for *_, author, post_id, text, date in user_rows[
+                :DIGEST_MAX_POSTS
+            ]
+        ]
+        body = template.render({
+            'username': username,
+            'posts': posts,
+            'more': len(user_rows) - len(posts),
+            'site_url': SITE_URL,
+        })
+        yield user_id, EmailMessage(DIGEST_SUBJECT, body, to=[email])
+
+
+def start_run():
+    """Новая рассылка: посты после прошлой рассылки до последнего поста.
+
+    Первая рассылка берёт посты за DIGEST_FIRST_PERIOD. Посты моложе
+    DIGEST_LAG и все после них остаются следующей рассылке.
+    """
+    previous = DigestRun.objects.filter(finished=True).first()
+    if previous:
+        after_post_id = previous.last_post_id
+    else:
+        since = timezone.now() - timedelta(seconds=DIGEST_FIRST_PERIOD)
+        after_post_id = Post.objects.filter(
+            pub_date__lte=since
+        ).aggregate(Max('id'))['id__max'] or 0
+    settled_before = timezone.now() - timedelta(seconds=DIGEST_LAG)
+    new_posts = Post.objects.filter(pk__gt=after_post_id)
+    first_fresh_id = new_posts.filter(
+        pub_date__gte=settled_before
+    ).aggregate(Min('id'))['id__min']
+    if first_fresh_id is not None:
+        new_posts = new_posts.filter(pk__lt=first_fresh_id)
+    last_post_id = new_posts.aggregate(Max('id'))['id__max'] or 0
+    return DigestRun.objects.create(
+        after_post_id=after_post_id,
+        last_post_id=max(last_post_id, after_post_id),
+    )
+
+
+def send_digests(chunk_size=500):
+    """Отправляет подписчикам посты, вышедшие с прошлой рассылки.
+
+    Незавершённая рассылка продолжается, а не начинается заново.
+    Возвращает число писем рассылки.
+    """
+    run = DigestRun.objects.filter(finished=False).first() or start_run()
+    connection = get_connection()
+    while True:
+        # Пачка читается целиком до коммита, а не курсором через коммиты
+        user_ids = next_subscribers(run, chunk_size)
+        if not user_ids:
+            break
+        messages = [
+            message for _, message in build_digests(digest_rows(run, user_ids))
+        ]
+        with transaction.atomic():
+            run.recipients += connection.send_messages(messages) or 0
+            run.last_user_id = user_ids[-1]
+            run.save(update_fields=['recipients', 'last_user_id'])
+    run.finished = True
+    run.save(update_fields=['finished'])
+    return run.recipients
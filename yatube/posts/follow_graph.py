@@ -0,0 +1,110 @@
+"""Граф подписок: множества id подписок и подписчиков хранятся в кеше.
+
+Множества упакованы в массив беззнаковых целых (8 байт на id)
+и сбрасываются сигналами при создании и удалении Follow.
+"""
+from array import array
+from collections import Counter
+
+from django.core.cache import cache
+
+from yatube.settings import FOLLOW_CACHE_TIMEOUT
+from .models import Follow
+
+FOLLOWING_KEY = 'posts:following:{}'
+FOLLOWERS_KEY = 'posts:followers:{}'
+# Сколько id передавать в одном IN (...): у старых сборок SQLite
+# предел 999 параметров на запрос
+IN_CHUNK_SIZE = 500
+
+
+def _pack(ids):
+    return array('Q', sorted(ids)).tobytes()
+
+
+def _unpack(data):
+    ids = array('Q')
+    ids.frombytes(data)
+    return frozenset(ids)
+
+
+def _get_sets(key_template, owner_field, target_field, owner_ids):
+    """Возвращает словарь {id владельца: frozenset связанных id}.
+
+    Отсутствующие в кеше множества дочитываются запросами по
+    IN_CHUNK_SIZE владельцев.
+    """
+    keys = {key_template.format(pk): pk for pk in owner_ids}
+    cached = cache.get_many(keys)
+    result = {keys[key]: _unpack(data) for key, data in cached.items()}
+    missing = [pk for key, pk in keys.items() if key not in cached]
+    if missing:
+        loaded = {pk: set() for pk in missing}
+        for start in range(0, len(missing), IN_CHUNK_SIZE):
+            rows = Follow.objects.filter(
+                **{f'{owner_field}__in': missing[start:start + IN_CHUNK_SIZE]}
+            ).values_list(owner_field, target_field)
+            for owner_id, target_id in rows:
+                loaded[owner_id].add(target_id)
+        cache.set_many(
+            {key_template.format(pk): _pack(ids)
+             for pk, ids in loaded.items()},
+            FOLLOW_CACHE_TIMEOUT
+        )
+        result.update(
+            {pk: frozenset(ids) for pk, ids in loaded.items()}
+        )
+    return result
+
+
+def following_ids(user_id):
+    """id авторов, на которых подписан пользователь."""
+    return _get_sets(
+        FOLLOWING_KEY, 'user_id', 'author_id', [user_id]
+    )[user_id]
+
+
+def follower_ids(author_id):
+    """id подписчиков автора."""
+    return _get_sets(
+        FOLLOWERS_KEY, 'author_id', 'user_id', [author_id]
+    )[author_id]
+
+
+def follower_count(author_id):
+    return len(follower_ids(author_id))
+
+
+def is_following(user_id, author_id):
+    return author_id in following_ids(user_id)
+
+
+def mutuals(user_id):
+    """id пользователей, подписанных друг на друга с данным."""
+    return following_ids(user_id) & follower_ids(user_id)
+
+
+def suggested_authors(user_id, limit=5):
+    """id авторов, на которых чаще всего подписаны авторы пользователя.
+
+    Учитываются только те, на кого пользователь ещё не подписан.
+    """
+    following = following_ids(user_id)
+    if not following:
+        return []
+    counts = Counter()
+    second_hand = _get_sets(
+        FOLLOWING_KEY, 'user_id', 'author_id', following
+    )
+    for ids in second_hand.values():
+        counts.update(ids - following)
+    counts.pop(user_id, None)
+    return [author_id for author_id, _ in counts.most_common(limit)]
+
+
+def invalidate(user_id, author_id):
+    """Сбрасывает кеш подписок после изменения связи user -> author."""
+    cache.delete_many([
+        FOLLOWING_KEY.format(user_id),
+        FOLLOWERS_KEY.format(author_id),
+    ])
@@ -0,0 +1,57 @@
+import logging
+import os
+import shutil
+import time
+
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from yatube.settings import IMAGE_RELEASE_GRACE
+from .models import Post
+from .renditions import invalidate_renditions
+
+logger = logging.getLogger(__name__)
+
+
+def delete_image(name, quarantine=None):
+    """Удаляет файл картинки поста вместе с её миниатюрами.
+
+    Если передан каталог quarantine, файл картинки переносится в него
+    под тем же относительным именем. Миниатюры и их записи в хранилище
+    ключей удаляются в обоих случаях: их можно создать заново.
+    """
+    storage = Post._meta.get_field('image').storage
+    default.kvstore.delete(ImageFile(name, storage))
+    invalidate_renditions(name)
+    if quarantine is None:
+        storage.delete(name)
+        return
+    target = os.path.join(quarantine, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(storage.path(name), target)
+
+
+def release_image(name, quarantine=None):
+    """Удаляет картинку и её миниатюры, если на неё не ссылается ни один пост.
+
+    Одинаковые картинки хранятся одним файлом, поэтому число постов
+    с таким именем картинки служит счётчиком ссылок. Файлы, загруженные
+    не раньше IMAGE_RELEASE_GRACE секунд назад, не удаляются: тот же
+    файл мог только что загрузить пост, ещё не сохранённый в базе.
+    Их позже удалит collect_media_garbage. С quarantine файл
+    переносится в этот каталог (см. delete_image). Ошибки удаления только
+    логируются: правка или удаление поста из-за них не падает.
+    """
+    if not name:
+        return
+    storage = Post._meta.get_field('image').storage
+    try:
+        with storage.lock():
+            if Post.objects.filter(image=name).exists():
+                return
+            age = time.time() - os.path.getmtime(storage.path(name))
+            if age < IMAGE_RELEASE_GRACE:
+                return
+            delete_image(name, quarantine)
+    except Exception:
+        logger.exception('Не удалось удалить картинку %s', name)
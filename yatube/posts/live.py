@@ -0,0 +1,29 @@
+"""События для живого обновления ленты и комментариев."""
+from django.template.loader import render_to_string
+
+from core.events import publish
+
+FEED_CHANNEL = 'posts'
+COMMENTS_CHANNEL = 'post:{}'
+COMMENT_TEMPLATE = 'includes/comment_item.html'
+
+
+def comments_channel(post_id):
+    return COMMENTS_CHANNEL.format(post_id)
+
+
+def publish_post(post):
+    """Сообщает лентам, что появился новый пост."""
+    publish(FEED_CHANNEL, 'post', {
+        'id': post.pk,
+        'author': post.author_id,
+        'group': post.group_id,
+    })
+
+
+def publish_comment(comment):
+    """Отправляет странице поста готовую разметку нового комментария."""
+    publish(comments_channel(comment.post_id), 'comment', {
+        'id': comment.pk,
+        'html': render_to_string(COMMENT_TEMPLATE, {'comment': comment}),
+    })
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.renditions import (
+    FALLBACK_FORMAT, IMAGE_RENDITION_WIDTHS, MODERN_FORMATS, make_rendition
+)
+from sorl.thumbnail import get_thumbnail
+
+# Картинка, которую шаблоны отдавали всем клиентам до адаптивных версий
+LEGACY_GEOMETRY = '960x339'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает объём адаптивных версий картинок постов '
+        'с единой картинкой 960x339'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Сколько последних постов с картинками учитывать'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')[:options['limit']]
+        formats = [FALLBACK_FORMAT[0]] + [name for name, _ in MODERN_FORMATS]
+        legacy_total = 0
+        totals = {
+            (image_format, width): 0
+            for image_format in formats for width in IMAGE_RENDITION_WIDTHS
+        }
+        count = 0
+        for post in posts.iterator():
+            legacy = get_thumbnail(
+                post.image, LEGACY_GEOMETRY, crop='center', upscale=True
+            )
+            legacy_total += legacy.storage.size(legacy.name)
+            for image_format, width in totals:
+                rendition = make_rendition(post.image, width, image_format)
+                totals[image_format, width] += rendition.storage.size(
+                    rendition.name
+                )
+            count += 1
+        if not count:
+            self.stdout.write('Нет постов с картинками')
+            return
+        self.stdout.write(
+            f'Постов: {count}, {LEGACY_GEOMETRY}: {legacy_total} байт'
+        )
+        for (image_format, width), total in totals.items():
+            saving = 100 * (1 - total / legacy_total)
+            self.stdout.write(
+                f'{image_format:>5} {width:>5}w: {total:>10} байт, '
+                f'экономия {saving:.1f}%'
+            )
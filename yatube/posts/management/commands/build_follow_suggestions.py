@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import build_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации подписок для всех пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько пользователей обрабатывать за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        total = build_suggestions(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Сохранено рекомендаций: {total}')
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.rollups import roll_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Добавляет в сводную статистику по дням посты, комментарии '
+        'и подписки, появившиеся с прошлого запуска'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк источника учитывать за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        processed = roll_up(batch_size=options['batch_size'])
+        summary = ', '.join(
+            f'{source}: {count}' for source, count in processed.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Учтено строк — {summary}'))
@@ -0,0 +1,204 @@
+import json
+import os
+import posixpath
+import shutil
+import time
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts.images import release_image
+from posts.models import Post
+
+STATE_FILE = '.media_gc.json'
+QUARANTINE_DIR = '.quarantine'
+
+
+def walk_sorted(root, relative, start_after=()):
+    """Обходит файлы дерева каталогов в алфавитном порядке.
+
+    Возвращает пары (имя относительно root, os.stat_result). Файлы
+    и каталоги до start_after (кортежа частей пути) пропускаются.
+    Чтобы выдавать имена по порядку, содержимое каждого каталога
+    читается и сортируется в памяти целиком, но в памяти одновременно
+    только каталоги текущего пути, а не всё дерево. Картинки разложены
+    по подкаталогам из первых символов хеша, поэтому каталоги невелики.
+    """
+    try:
+        entries = sorted(
+            os.scandir(os.path.join(root, relative)),
+            key=lambda entry: entry.name
+        )
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        name = posixpath.join(relative, entry.name)
+        parts = tuple(name.split('/'))
+        if parts < start_after[:len(parts)]:
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_sorted(root, name, start_after)
+        elif entry.is_file(follow_symlinks=False) and parts > start_after:
+            yield name, entry.stat(follow_symlinks=False)
+
+
+def referenced_images(names):
+    return set(
+        Post.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+
+
+def referenced_thumbnails(names):
+    """Миниатюры, о которых знает хранилище ключей sorl-thumbnail.
+
+    Проект использует хранилище ключей в базе (cached_db), поэтому
+    пачка имён проверяется одним запросом к его таблице.
+    """
+    keys = {
+        add_prefix(ImageFile(name, default.storage).key): name
+        for name in names
+    }
+    found = KVStore.objects.filter(key__in=keys).values_list('key', flat=True)
+    return {keys[key] for key in found}
+
+
+def release_thumbnail(name, quarantine=None):
+    """Удаляет миниатюру или переносит её в каталог quarantine.
+
+    Пока шла сверка пачки, sorl-thumbnail мог заново создать эту
+    миниатюру, поэтому ссылка на неё проверяется ещё раз прямо
+    перед удалением.
+    """
+    if referenced_thumbnails([name]):
+        return
+    if quarantine is None:
+        default.storage.delete(name)
+        return
+    target = os.path.join(quarantine, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(default.storage.path(name), target)
+
+
+class Command(BaseCommand):
+    help = (
+        'Находит и удаляет картинки постов и миниатюры, на которые '
+        'больше ничего не ссылается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать найденные файлы'
+        )
+        parser.add_argument(
+            '--quarantine',
+            action='store_true',
+            help=f'Переносить файлы в {QUARANTINE_DIR} вместо удаления'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько файлов сверять с базой за один запрос'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24,
+            help='Не трогать файлы моложе стольких часов'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать обход заново, а не с сохранённого места'
+        )
+
+    def handle(self, *args, **options):
+        self.root = settings.MEDIA_ROOT
+        self.options = options
+        self.state_path = os.path.join(self.root, STATE_FILE)
+        self.deadline = time.time() - options['min_age'] * 60 * 60
+        self.found = self.freed = 0
+
+        state = {} if options['restart'] else self.load_state()
+        quarantine = (
+            os.path.join(self.root, QUARANTINE_DIR)
+            if options['quarantine'] else None
+        )
+        phases = (
+            # Перед удалением или переносом картинка ещё раз проверяется
+            # под блокировкой хранилища, а её миниатюры и описания версий
+            # сбрасываются
+            (
+                'posts',
+                referenced_images,
+                partial(release_image, quarantine=quarantine),
+            ),
+            (
+                thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/'),
+                referenced_thumbnails,
+                partial(release_thumbnail, quarantine=quarantine),
+            ),
+        )
+        for directory, find_referenced, delete in phases:
+            if state.get('done', {}).get(directory):
+                continue
+            start_after = tuple(state.get(directory, '').split('/'))
+            files = walk_sorted(
+                self.root, directory, start_after if start_after[0] else ()
+            )
+            while True:
+                batch = list(islice(files, self.options['batch_size']))
+                if not batch:
+                    break
+                self.collect(batch, find_referenced, delete)
+                state[directory] = batch[-1][0]
+                self.save_state(state)
+            state.setdefault('done', {})[directory] = True
+            self.save_state(state)
+
+        if not options['dry_run'] and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        action = 'Найдено' if options['dry_run'] else 'Обработано'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} лишних файлов: {self.found}, '
+            f'{self.freed / 1024 / 1024:.1f} МБ'
+        ))
+
+    def collect(self, batch, find_referenced, delete):
+        old_enough = {
+            name: stat for name, stat in batch
+            if stat.st_mtime < self.deadline
+        }
+        if not old_enough:
+            return
+        referenced = find_referenced(list(old_enough))
+        for name, stat in old_enough.items():
+            if name in referenced:
+                continue
+            self.found += 1
+            self.freed += stat.st_size
+            if self.options['verbosity'] >= 2 or self.options['dry_run']:
+                self.stdout.write(f'{name} ({stat.st_size} байт)')
+            if not self.options['dry_run']:
+                delete(name)
+
+    def load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as state_file:
+                return json.load(state_file)
+        return {}
+
+    def save_state(self, state):
+        if self.options['dry_run']:
+            return
+        with open(self.state_path, 'w') as state_file:
+            json.dump(state, state_file)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.markup import render_texts
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново готовит HTML текстов постов и комментариев; нужен после '
+        'изменений разметки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько строк обрабатывать за один проход'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            processed = render_texts(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обновлено {processed}'
+            ))
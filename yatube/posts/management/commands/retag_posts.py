@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tags import tag_posts
+
+
+class Command(BaseCommand):
+    help = 'Заново разбирает хештеги во всех постах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько постов разбирать за один проход'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id, processed = 0, 0
+        while True:
+            # Пачки по id, а не по смещению: каждая читается по индексу
+            # первичного ключа, и в памяти только одна пачка текстов
+            batch = list(
+                Post.objects.filter(pk__gt=last_id).order_by('pk').values_list(
+                    'pk', 'text', 'pub_date'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            tag_posts(batch)
+            last_id = batch[-1][0]
+            processed += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f'Хештеги разобраны в постах: {processed}')
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает подписчикам письма с постами их авторов, '
+        'вышедшими с прошлой рассылки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Сколько писем передавать почтовому движку за раз'
+        )
+
+    def handle(self, *args, **options):
+        total = send_digests(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {total}'))
@@ -0,0 +1,134 @@
+"""Разметка текстов постов и комментариев.
+
+Текст превращается в HTML один раз при сохранении: абзацы и переносы
+строк, ссылки на адреса, хештеги и упоминания, а также **полужирный**
+и *курсив*. Всё остальное экранируется, поэтому в шаблонах результат
+выводится как есть.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.html import escape, linebreaks
+
+User = get_user_model()
+
+# Слово длиннее 50 знаков после # не обрезается, а не считается хештегом
+HASHTAG_RE = re.compile(r'(?<![\w#&])#(?P<tag>\w{1,50})(?!\w)')
+MENTION_RE = re.compile(r'(?<![\w@])@(?P<mention>[\w.@+-]{1,150})')
+URL_RE = re.compile(r'(?P<url>\b(?:https?://|www\.)[^\s<>"]+)')
+TOKEN_RE = re.compile(
+    '|'.join(regex.pattern for regex in (URL_RE, HASHTAG_RE, MENTION_RE)),
+    re.IGNORECASE
+)
+STRONG_RE = re.compile(r'\*\*(.+?)\*\*')
+EM_RE = re.compile(r'\*(.+?)\*')
+# Знаки в конце адреса, которые скорее относятся к предложению
+URL_TRAILING = '.,:;!?)\'"'
+
+
+def extract_mentions(text):
+    """Множество имён пользователей, упомянутых в тексте."""
+    # Точка в конце имени — скорее конец предложения
+    names = {name.rstrip('.') for name in MENTION_RE.findall(text)}
+    names.discard('')
+    return names
+
+
+def _split_trailing(value, chars):
+    stripped = value.rstrip(chars)
+    return stripped, value[len(stripped):]
+
+
+def _emphasis(html):
+    html = STRONG_RE.sub(r'<strong>\1</strong>', html)
+    return EM_RE.sub(r'<em>\1</em>', html)
+
+
+def _render_token(match, usernames):
+    if match['url']:
+        url, trailing = _split_trailing(match['url'], URL_TRAILING)
+        href = url if '://' in url else f'http://{url}'
+        return (
+            f'<a href="{escape(href)}" rel="nofollow">{escape(url)}</a>'
+            f'{escape(trailing)}'
+        )
+    if match['tag']:
+        name = match['tag']
+        href = reverse('posts:tag', args=[name.lower()])
+        return f'<a href="{escape(href)}">#{escape(name)}</a>'
+    username, trailing = _split_trailing(match['mention'], '.')
+    if username not in usernames:
+        return escape(match.group())
+    href = reverse('posts:profile', args=[username])
+    return f'<a href="{escape(href)}">@{escape(username)}</a>{trailing}'
+
+
+def existing_usernames(names):
+    """Те из имён, под которыми есть пользователи, одним запросом."""
+    if not names:
+        return set()
+    return set(
+        User.objects.filter(username__in=names).values_list(
+            'username', flat=True
+        )
+    )
+
+
+def mentioned_users(text):
+    """Упомянутые в тексте пользователи {имя: id} одним запросом."""
+    names = extract_mentions(text)
+    if not names:
+        return {}
+    return dict(
+        User.objects.filter(username__in=names).values_list(
+            'username', 'pk'
+        )
+    )
+
+
+def render_text(text, usernames=None):
+    """HTML текста; ссылками становятся только существующие пользователи.
+
+    usernames — уже проверенные имена; если их не передали, упомянутые
+    в тексте имена проверяются одним запросом.
+    """
+    if usernames is None:
+        usernames = existing_usernames(extract_mentions(text))
+    parts, position = [], 0
+    for match in TOKEN_RE.finditer(text):
+        parts.append(_emphasis(escape(text[position:match.start()])))
+        parts.append(_render_token(match, usernames))
+        position = match.end()
+    parts.append(_emphasis(escape(text[position:])))
+    return linebreaks(''.join(parts))
+
+
+def render_texts(model, batch_size=500):
+    """Заново готовит HTML всех текстов модели пачками по первичному ключу.
+
+    Подходит и для исторических моделей миграций: от модели нужны
+    только поля text и text_html. Возвращает число обновлённых строк.
+    """
+    last_id, processed = 0, 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk').only(
+                'pk', 'text', 'text_html'
+            )[:batch_size]
+        )
+        if not batch:
+            return processed
+        # Упомянутые в пачке имена проверяются одним запросом
+        usernames = existing_usernames(set().union(
+            *(extract_mentions(row.text) for row in batch)
+        ))
+        changed = []
+        for row in batch:
+            html = render_text(row.text, usernames)
+            if html != row.text_html:
+                row.text_html = html
+                changed.append(row)
+        model.objects.bulk_update(changed, ['text_html'])
+        last_id = batch[-1].pk
+        processed += len(changed)
@@ -0,0 +1,71 @@
+"""Упоминания пользователей (@username) в постах и комментариях.
+
+Все имена из текста разрешаются одним запросом username__in ещё
+при сохранении (Post.save, Comment.save), а уведомления пишутся
+одним bulk_create, поэтому число запросов не зависит от числа
+упомянутых. Число непрочитанных упоминаний кешируется
+и сбрасывается при новых упоминаниях и при прочтении.
+"""
+from django.core.cache import cache
+
+from yatube.settings import MENTIONS_CACHE_TIMEOUT
+from .markup import mentioned_users
+from .models import Mention
+
+UNREAD_CACHE_KEY = 'posts:mentions:unread:{}'
+
+
+def notify(post, comment=None):
+    """Создаёт уведомления для упомянутых в посте или комментарии.
+
+    При правке поста уведомляются только упомянутые впервые; автор
+    текста себя не уведомляет. Возвращает id уведомлённых.
+    """
+    source = comment or post
+    # Сохранение текста уже нашло упомянутых
+    users = getattr(source, 'mentioned_users', None)
+    if users is None:
+        users = mentioned_users(source.text)
+    user_ids = set(users.values()) - {source.author_id}
+    if comment is None and user_ids:
+        user_ids -= set(
+            Mention.objects.filter(
+                post=post, comment=None, user_id__in=user_ids
+            ).values_list('user_id', flat=True)
+        )
+    if not user_ids:
+        return set()
+    Mention.objects.bulk_create([
+        Mention(
+            user_id=user_id,
+            author_id=source.author_id,
+            post=post,
+            comment=comment
+        )
+        for user_id in user_ids
+    ])
+    cache.delete_many([UNREAD_CACHE_KEY.format(pk) for pk in user_ids])
+    return user_ids
+
+
+def unread_count(user_id):
+    """Число непрочитанных упоминаний пользователя."""
+    key = UNREAD_CACHE_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Mention.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, MENTIONS_CACHE_TIMEOUT)
+    return count
+
+
+def mark_read(user_id, mention_ids):
+    """Отмечает прочитанными упоминания пользователя с данными id.
+
+    Упоминания, пришедшие после показа страницы, остаются
+    непрочитанными; число непрочитанных пересчитывается при
+    следующем обращении.
+    """
+    if Mention.objects.filter(
+        user_id=user_id, pk__in=mention_ids, is_read=False
+    ).update(is_read=True):
+        cache.delete(UNREAD_CACHE_KEY.format(user_id))
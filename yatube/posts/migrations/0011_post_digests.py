@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_until', models.DateTimeField(db_index=True, verbose_name='Учтены посты до')),
+                ('recipients', models.PositiveIntegerField(default=0, verbose_name='Число получателей')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата рассылки')),
+            ],
+            options={
+                'verbose_name': 'Рассылка новых постов',
+                'verbose_name_plural': 'Рассылки новых постов',
+                'ordering': ['-posts_until'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_date_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_stats', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('views', models.BigIntegerField(default=0, verbose_name='Просмотров')),
+                ('visitors', models.BinaryField(default=b'', verbose_name='Скетч HyperLogLog уникальных читателей')),
+            ],
+            options={
+                'verbose_name': 'Статистика просмотров',
+                'verbose_name_plural': 'Статистика просмотров',
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:37
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def posts_until_to_ids(apps, schema_editor):
+    """Прошлые рассылки получают границу по id поста вместо даты."""
+    DigestRun = apps.get_model('posts', 'DigestRun')
+    Post = apps.get_model('posts', 'Post')
+    for run in DigestRun.objects.all():
+        run.last_post_id = Post.objects.filter(
+            pub_date__lte=run.posts_until
+        ).aggregate(Max('id'))['id__max'] or 0
+        run.finished = True
+        run.save(update_fields=['last_post_id', 'finished'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digestrun',
+            name='after_post_id',
+            field=models.PositiveIntegerField(default=0, verbose_name='Учтены посты после id'),
+        ),
+        migrations.AddField(
+            model_name='digestrun',
+            name='finished',
+            field=models.BooleanField(default=False, verbose_name='Завершена'),
+        ),
+        migrations.AddField(
+            model_name='digestrun',
+            name='last_post_id',
+            field=models.PositiveIntegerField(db_index=True, default=0, verbose_name='Учтены посты до id включительно'),
+        ),
+        migrations.AddField(
+            model_name='digestrun',
+            name='last_user_id',
+            field=models.PositiveIntegerField(default=0, verbose_name='Последний обработанный подписчик'),
+        ),
+        migrations.RunPython(posts_until_to_ids, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='digestrun',
+            name='posts_until',
+        ),
+        migrations.AlterModelOptions(
+            name='digestrun',
+            options={'ordering': ['-last_post_id'], 'verbose_name': 'Рассылка новых постов', 'verbose_name_plural': 'Рассылки новых постов'},
+        ),
+    ]
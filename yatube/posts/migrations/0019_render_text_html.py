@@ -0,0 +1,110 @@
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import migrations
+from django.utils.html import escape, linebreaks
+
+# Копия разметки из posts.markup на момент миграции: миграция должна
+# давать тот же результат, как бы разметка ни менялась дальше
+HASHTAG_RE = re.compile(r'(?<![\w#&])#(?P<tag>\w{1,50})(?!\w)')
+MENTION_RE = re.compile(r'(?<![\w@])@(?P<mention>[\w.@+-]{1,150})')
+URL_RE = re.compile(r'(?P<url>\b(?:https?://|www\.)[^\s<>"]+)')
+TOKEN_RE = re.compile(
+    '|'.join(regex.pattern for regex in (URL_RE, HASHTAG_RE, MENTION_RE)),
+    re.IGNORECASE
+)
+STRONG_RE = re.compile(r'\*\*(.+?)\*\*')
+EM_RE = re.compile(r'\*(.+?)\*')
+URL_TRAILING = '.,:;!?)\'"'
+# Адреса тегов и профилей в том виде, в каком их строит reverse
+TAG_PATH = '/tag/{}/'
+PROFILE_PATH = '/profile/{}/'
+PATH_SAFE = "!$&'()*+,;=/~:@"
+BATCH_SIZE = 500
+
+
+def extract_mentions(text):
+    names = {name.rstrip('.') for name in MENTION_RE.findall(text)}
+    names.discard('')
+    return names
+
+
+def _split_trailing(value, chars):
+    stripped = value.rstrip(chars)
+    return stripped, value[len(stripped):]
+
+
+def _emphasis(html):
+    html = STRONG_RE.sub(r'<strong>\1</strong>', html)
+    return EM_RE.sub(r'<em>\1</em>', html)
+
+
+def _render_token(match, usernames):
+    if match['url']:
+        url, trailing = _split_trailing(match['url'], URL_TRAILING)
+        href = url if '://' in url else f'http://{url}'
+        return (
+            f'<a href="{escape(href)}" rel="nofollow">{escape(url)}</a>'
+            f'{escape(trailing)}'
+        )
+    if match['tag']:
+        name = match['tag']
+        href = quote(TAG_PATH.format(name.lower()), safe=PATH_SAFE)
+        return f'<a href="{escape(href)}">#{escape(name)}</a>'
+    username, trailing = _split_trailing(match['mention'], '.')
+    if username not in usernames:
+        return escape(match.group())
+    href = quote(PROFILE_PATH.format(username), safe=PATH_SAFE)
+    return f'<a href="{escape(href)}">@{escape(username)}</a>{trailing}'
+
+
+def render_text(text, usernames):
+    parts, position = [], 0
+    for match in TOKEN_RE.finditer(text):
+        parts.append(_emphasis(escape(text[position:match.start()])))
+        parts.append(_render_token(match, usernames))
+        position = match.end()
+    parts.append(_emphasis(escape(text[position:])))
+    return linebreaks(''.join(parts))
+
+
+def render_texts(model, user_model):
+    last_id = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk').only(
+                'pk', 'text', 'text_html'
+            )[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        names = set().union(*(extract_mentions(row.text) for row in batch))
+        usernames = set(
+            user_model.objects.filter(username__in=names).values_list(
+                'username', flat=True
+            )
+        ) if names else set()
+        for row in batch:
+            row.text_html = render_text(row.text, usernames)
+        model.objects.bulk_update(batch, ['text_html'])
+        last_id = batch[-1].pk
+
+
+def fill_text_html(apps, schema_editor):
+    """HTML для постов и комментариев, сохранённых до поля text_html."""
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    for name in ('Post', 'Comment'):
+        render_texts(apps.get_model('posts', name), user_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_digest_id_watermark'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_text_html, migrations.RunPython.noop),
+    ]
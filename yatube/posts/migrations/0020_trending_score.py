@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_render_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Сообщество')], max_length=5, verbose_name='Вид')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг на момент последнего события')),
+                ('updated', models.FloatField(help_text='Секунды Unix', verbose_name='Время последнего события')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг популярного',
+                'verbose_name_plural': 'Рейтинг популярного',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendingscore',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_trending_score'),
+        ),
+    ]
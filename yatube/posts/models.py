@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from yatube.settings import LEN_OBJ_NAME
+from core.hyperloglog import HyperLogLog
+from core.storage import ContentAddressedStorage
+from yatube.settings import LEN_OBJ_NAME, VISITORS_PRECISION
+from .markup import mentioned_users, render_text
 
 User = get_user_model()
 
@@ -29,6 +32,12 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст в HTML',
+        help_text='Заполняется из текста при сохранении'
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
@@ -51,9 +60,22 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        db_index=True
     )
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            # Упомянутые пользователи нужны и разметке, и уведомлениям
+            # (mentions.notify), поэтому ищутся один раз
+            self.mentioned_users = mentioned_users(self.text)
+            self.text_html = render_text(self.text, set(self.mentioned_users))
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.text[:LEN_OBJ_NAME]
 
@@ -61,6 +83,17 @@ class Post(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_date_idx'
+            ),
+            models.Index(fields=['-pub_date'], name='post_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -80,11 +113,28 @@ class Comment(models.Model):
         verbose_name='Текст комментария',
         help_text='Напишите комментарий'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст в HTML',
+        help_text='Заполняется из текста при сохранении'
+    )
     created = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата комментария'
     )
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            # Упомянутые пользователи нужны и разметке, и уведомлениям
+            # (mentions.notify), поэтому ищутся один раз
+            self.mentioned_users = mentioned_users(self.text)
+            self.text_html = render_text(self.text, set(self.mentioned_users))
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return (
             f'Комментарий к посту с id {self.post.id}:'
@@ -110,6 +160,10 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата подписки'
+    )
 
     def __str__(self):
         return (
@@ -126,3 +180,331 @@ class Follow(models.Model):
                 name='unique_subscription'
             )
         ]
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.FloatField(verbose_name='Вес рекомендации')
+
+    def __str__(self):
+        return (
+            f'Пользователю {self.user} рекомендован '
+            f'автор {self.author}'
+        )
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_suggestion'
+            )
+        ]
+
+
+class TrendingScore(models.Model):
+    POST = 'post'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (GROUP, 'Сообщество'),
+    )
+
+    kind = models.CharField(
+        max_length=5,
+        choices=KIND_CHOICES,
+        verbose_name='Вид'
+    )
+    object_id = models.PositiveIntegerField(verbose_name='id объекта')
+    score = models.FloatField(
+        default=0,
+        verbose_name='Рейтинг на момент последнего события'
+    )
+    updated = models.FloatField(
+        verbose_name='Время последнего события',
+        help_text='Секунды Unix'
+    )
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}: {self.score:.2f}'
+
+    class Meta:
+        verbose_name = 'Рейтинг популярного'
+        verbose_name_plural = 'Рейтинг популярного'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='unique_trending_score'
+            ),
+        ]
+
+
+class DigestRun(models.Model):
+    after_post_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Учтены посты после id'
+    )
+    last_post_id = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        verbose_name='Учтены посты до id включительно'
+    )
+    last_user_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последний обработанный подписчик'
+    )
+    finished = models.BooleanField(
+        default=False,
+        verbose_name='Завершена'
+    )
+    recipients = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число получателей'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата рассылки'
+    )
+
+    def __str__(self):
+        return (
+            f'Рассылка постов {self.after_post_id + 1}–{self.last_post_id}'
+        )
+
+    class Meta:
+        ordering = ['-last_post_id']
+        verbose_name = 'Рассылка новых постов'
+        verbose_name_plural = 'Рассылки новых постов'
+
+
+class PostViewStats(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='view_stats',
+        verbose_name='Пост'
+    )
+    views = models.BigIntegerField(default=0, verbose_name='Просмотров')
+    visitors = models.BinaryField(
+        default=b'',
+        verbose_name='Скетч HyperLogLog уникальных читателей'
+    )
+
+    def __str__(self):
+        return f'Просмотры поста {self.post_id}'
+
+    def visitors_sketch(self):
+        return HyperLogLog.from_bytes(bytes(self.visitors), VISITORS_PRECISION)
+
+    @property
+    def unique_visitors(self):
+        return self.visitors_sketch().count()
+
+    class Meta:
+        verbose_name = 'Статистика просмотров'
+        verbose_name_plural = 'Статистика просмотров'
+
+
+class AuthorDailyStats(models.Model):
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Автор'
+    )
+    day = models.DateField(verbose_name='День')
+    posts = models.PositiveIntegerField(default=0, verbose_name='Постов')
+    comments = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+    new_followers = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Новых подписчиков'
+    )
+
+    def __str__(self):
+        return f'Активность {self.author} за {self.day:%d.%m.%Y}'
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'Активность автора за день'
+        verbose_name_plural = 'Активность авторов по дням'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'day'],
+                name='unique_author_day'
+            )
+        ]
+
+
+class GroupDailyStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Сообщество'
+    )
+    day = models.DateField(verbose_name='День')
+    posts = models.PositiveIntegerField(default=0, verbose_name='Постов')
+    comments = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+
+    def __str__(self):
+        return f'Активность {self.group} за {self.day:%d.%m.%Y}'
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'Активность сообщества за день'
+        verbose_name_plural = 'Активность сообществ по дням'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'day'],
+                name='unique_group_day'
+            )
+        ]
+
+
+class RollupWatermark(models.Model):
+    source = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Источник'
+    )
+    last_id = models.BigIntegerField(
+        default=0,
+        verbose_name='Последний учтённый id'
+    )
+
+    def __str__(self):
+        return f'{self.source}: до id {self.last_id}'
+
+    class Meta:
+        verbose_name = 'Отметка сводной статистики'
+        verbose_name_plural = 'Отметки сводной статистики'
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Хештег',
+        help_text='Хранится без # и в нижнем регистре'
+    )
+
+    def __str__(self):
+        return f'#{self.name}'
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Хештег'
+        verbose_name_plural = 'Хештеги'
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Хештег'
+    )
+    # Копия даты поста, чтобы лента тега читалась только по индексу
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    def __str__(self):
+        return f'{self.tag} в посте {self.post_id}'
+
+    class Meta:
+        verbose_name = 'Хештег поста'
+        verbose_name_plural = 'Хештеги постов'
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post'],
+                name='posttag_tag_date_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'tag'],
+                name='unique_post_tag'
+            )
+        ]
+
+
+class Mention(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кто упомянул'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='mentions',
+        verbose_name='Комментарий'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата упоминания'
+    )
+    is_read = models.BooleanField(
+        default=False,
+        verbose_name='Прочитано'
+    )
+
+    def __str__(self):
+        return f'Упоминание {self.user_id} в посте {self.post_id}'
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        indexes = [
+            models.Index(
+                fields=['user', 'is_read'],
+                name='mention_user_unread_idx'
+            ),
+        ]
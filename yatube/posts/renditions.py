@@ -0,0 +1,120 @@
+"""Адаптивные версии картинок постов.
+
+Для каждой картинки sorl-thumbnail создаёт несколько версий разной
+ширины в формате JPEG и, если Pillow собран с поддержкой WebP, в WebP.
+Браузер сам выбирает подходящую версию по srcset и sizes.
+
+Готовые описания версий хранятся в общем кеше под именем картинки.
+Имена картинок выводятся из их содержимого, поэтому описание не
+устаревает, пока файл не удалён. Для ленты описания всех картинок
+страницы читаются одним get_many вместо отдельных обращений
+к хранилищу ключей sorl-thumbnail для каждой миниатюры.
+"""
+import logging
+
+from django.core.cache import cache
+from PIL import features
+from sorl.thumbnail import get_thumbnail
+
+from yatube.settings import (
+    IMAGE_RENDITION_WIDTHS, IMAGE_ASPECT_RATIO, IMAGE_SIZES,
+    RENDITIONS_CACHE_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_FORMAT = ('JPEG', 'image/jpeg')
+# Современные форматы, которые отдаются через <source>; AVIF sorl-thumbnail
+# пока не умеет записывать
+MODERN_FORMATS = [
+    (name, mime) for name, mime, feature in (
+        ('WEBP', 'image/webp', 'webp'),
+    ) if features.check(feature)
+]
+RENDITIONS_CACHE_KEY = 'posts:renditions:{}'
+
+
+def renditions_key(name):
+    return RENDITIONS_CACHE_KEY.format(name)
+
+
+def rendition_geometry(width):
+    return f'{width}x{round(width * IMAGE_ASPECT_RATIO)}'
+
+
+def make_rendition(image, width, image_format):
+    return get_thumbnail(
+        image,
+        rendition_geometry(width),
+        crop='center',
+        upscale=True,
+        format=image_format,
+    )
+
+
+def _srcset(thumbnails):
+    return ', '.join(
+        f'{thumbnail.url} {width}w' for width, thumbnail in thumbnails
+    )
+
+
+def get_renditions(image):
+    """Описание версий картинки для тега <picture>.
+
+    Каждая версия создаётся один раз: самая широкая JPEG-версия
+    служит и запасным src. Возвращает None, если картинки нет или её
+    не удалось обработать.
+    """
+    if not image:
+        return None
+    try:
+        thumbnails = {
+            image_format: [
+                (width, make_rendition(image, width, image_format))
+                for width in sorted(IMAGE_RENDITION_WIDTHS)
+            ]
+            for image_format, _ in [FALLBACK_FORMAT, *MODERN_FORMATS]
+        }
+        fallback = thumbnails[FALLBACK_FORMAT[0]][-1][1]
+        return {
+            'src': fallback.url,
+            'width': fallback.width,
+            'height': fallback.height,
+            'srcset': _srcset(thumbnails[FALLBACK_FORMAT[0]]),
+            'sizes': IMAGE_SIZES,
+            'sources': [
+                {'type': mime, 'srcset': _srcset(thumbnails[image_format])}
+                for image_format, mime in MODERN_FORMATS
+            ],
+        }
+    except Exception:
+        logger.exception('Не удалось подготовить версии картинки %s', image)
+        return None
+
+
+def prefetch_renditions(images):
+    """Описания версий сразу для нескольких картинок.
+
+    Возвращает словарь {имя картинки: описание}. Закешированные
+    описания читаются одним запросом к кешу, недостающие создаются
+    и сохраняются одним set_many.
+    """
+    images = {image.name: image for image in images if image}
+    keys = {renditions_key(name): name for name in images}
+    pictures = {
+        keys[key]: picture
+        for key, picture in cache.get_many(list(keys)).items()
+    }
+    created = {}
+    for name, image in images.items():
+        if name not in pictures:
+            pictures[name] = get_renditions(image)
+            if pictures[name] is not None:
+                created[renditions_key(name)] = pictures[name]
+    if created:
+        cache.set_many(created, RENDITIONS_CACHE_TIMEOUT)
+    return pictures
+
+
+def invalidate_renditions(name):
+    cache.delete(renditions_key(name))
@@ -0,0 +1,148 @@
+"""Сводная статистика по дням для авторов и сообществ.
+
+Задача проходит по постам, комментариям и подпискам, появившимся
+после отметки прошлого запуска (по id), и добавляет их к дневным
+строкам AuthorDailyStats и GroupDailyStats по дате создания строки.
+Пачка строк и сдвиг отметки фиксируются одной транзакцией, поэтому
+повторный запуск после сбоя ничего не посчитает дважды. Страницы
+статистики читают только эти таблицы.
+
+Id выдаются при вставке, а видны строки после коммита, поэтому
+строка с меньшим id может появиться уже после строки с большим.
+Чтобы отметка не ушла дальше неё, задача учитывает строки только
+старше ROLLUP_LAG секунд и останавливается на первой более свежей.
+Строка транзакции, длившейся дольше ROLLUP_LAG, будет пропущена.
+
+Удаление постов, комментариев и подписок в сводке не отражается.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import takewhile
+
+from django.db import transaction
+from django.utils import timezone
+
+from yatube.settings import ROLLUP_LAG
+from .archive import invalidate_calendars
+from .models import (
+    AuthorDailyStats, Comment, Follow, GroupDailyStats, Post, RollupWatermark
+)
+
+
+def _post_increments(rows):
+    for row in rows:
+        day = timezone.localdate(row['pub_date'])
+        yield AuthorDailyStats, row['author_id'], day, 'posts'
+        if row['group_id']:
+            yield GroupDailyStats, row['group_id'], day, 'posts'
+
+
+def _comment_increments(rows):
+    for row in rows:
+        day = timezone.localdate(row['created'])
+        yield AuthorDailyStats, row['author_id'], day, 'comments'
+        if row['post__group_id']:
+            yield GroupDailyStats, row['post__group_id'], day, 'comments'
+
+
+def _follow_increments(rows):
+    for row in rows:
+        day = timezone.localdate(row['created'])
+        yield AuthorDailyStats, row['author_id'], day, 'new_followers'
+
+
+# (источник, модель, поле даты создания, прочие поля, счётчики)
+SOURCES = (
+    (
+        'posts',
+        Post,
+        'pub_date',
+        ('author_id', 'group_id'),
+        _post_increments
+    ),
+    (
+        'comments',
+        Comment,
+        'created',
+        ('author_id', 'post__group_id'),
+        _comment_increments
+    ),
+    ('follows', Follow, 'created', ('author_id',), _follow_increments),
+)
+
+OWNER_FIELDS = {
+    AuthorDailyStats: 'author_id',
+    GroupDailyStats: 'group_id',
+}
+
+
+def _apply(model, counts):
+    """Добавляет счётчики {(владелец, день): Counter(поле: число)}."""
+    owner_field = OWNER_FIELDS[model]
+    existing = {
+        (getattr(row, owner_field), row.day): row
+        for row in model.objects.filter(**{
+            f'{owner_field}__in': {owner for owner, _ in counts},
+            'day__in': {day for _, day in counts},
+        })
+    }
+    created, updated, fields = [], [], set()
+    for (owner, day), increments in counts.items():
+        row = existing.get((owner, day))
+        if row is None:
+            row = model(**{owner_field: owner, 'day': day})
+            created.append(row)
+        else:
+            updated.append(row)
+        for field, value in increments.items():
+            setattr(row, field, getattr(row, field) + value)
+            fields.add(field)
+    model.objects.bulk_create(created)
+    if updated:
+        model.objects.bulk_update(updated, sorted(fields))
+
+
+def _roll_up_batch(source, model, date_field, fields, increments,
+                   batch_size, settled_before):
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update(
+        ).get_or_create(source=source)
+        rows = model.objects.filter(pk__gt=watermark.last_id).order_by(
+            'pk'
+        ).values('pk', date_field, *fields)[:batch_size]
+        # Строки после первой свежей ждут следующего запуска
+        rows = list(takewhile(
+            lambda row: row[date_field] < settled_before, rows
+        ))
+        if not rows:
+            return 0
+        counts = defaultdict(lambda: defaultdict(Counter))
+        for stats_model, owner, day, field in increments(rows):
+            counts[stats_model][owner, day][field] += 1
+        for stats_model, model_counts in counts.items():
+            _apply(stats_model, model_counts)
+        watermark.last_id = rows[-1]['pk']
+        watermark.save(update_fields=['last_id'])
+    return len(rows)
+
+
+def roll_up(batch_size=1000):
+    """Учитывает новые строки всех источников.
+
+    Возвращает словарь {источник: число учтённых строк}.
+    """
+    settled_before = timezone.now() - timedelta(seconds=ROLLUP_LAG)
+    processed = {}
+    for source, model, date_field, fields, increments in SOURCES:
+        processed[source] = 0
+        while True:
+            count = _roll_up_batch(
+                source, model, date_field, fields, increments, batch_size,
+                settled_before
+            )
+            if not count:
+                break
+            processed[source] += count
+    if any(processed.values()):
+        invalidate_calendars()
+    return processed
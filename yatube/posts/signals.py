@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import follow_graph, live, mentions, tags, trending
+from .cache import invalidate_post, invalidate_group, invalidate_group_index
+from .images import release_image
+from .models import Post, Group, Follow, Comment
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def drop_cached_post(sender, instance, **kwargs):
+    """Сбрасывает кеш поста при его изменении или удалении."""
+    invalidate_post(instance.pk)
+    invalidate_group_index()
+
+
+@receiver(pre_save, sender=Group)
+def drop_renamed_group(sender, instance, **kwargs):
+    """При смене слага сбрасывает кеш сообщества по старому слагу."""
+    if instance.pk is None:
+        return
+    old_slug = Group.objects.filter(pk=instance.pk).values_list(
+        'slug', flat=True
+    ).first()
+    if old_slug and old_slug != instance.slug:
+        invalidate_group(old_slug)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def drop_cached_group(sender, instance, **kwargs):
+    """Сбрасывает кеш сообщества при его изменении или удалении."""
+    invalidate_group(instance.slug, instance.pk)
+    invalidate_group_index()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def drop_cached_follows(sender, instance, **kwargs):
+    """Сбрасывает кеш графа подписок при подписке или отписке."""
+    follow_graph.invalidate(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def rank_commented_post(sender, instance, created, **kwargs):
+    """Поднимает пост и сообщество в рейтинге за новый комментарий."""
+    if created:
+        trending.record_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def rank_followed_author(sender, instance, created, **kwargs):
+    """Поднимает последний пост автора в рейтинге за новую подписку."""
+    if created:
+        trending.record_follow(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unrank_deleted_post(sender, instance, **kwargs):
+    """Убирает удалённый пост из рейтинга популярного."""
+    trending.forget_post(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def unrank_deleted_group(sender, instance, **kwargs):
+    """Убирает удалённое сообщество из рейтинга популярного."""
+    trending.forget_group(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_replaced_image(sender, instance, **kwargs):
+    """Запоминает прежнюю картинку поста, если при правке её заменили."""
+    instance._replaced_image = None
+    if instance.pk is None:
+        return
+    old_image = Post.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True
+    ).first()
+    if old_image and old_image != instance.image.name:
+        instance._replaced_image = old_image
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    """После замены картинки удаляет прежнюю, если она больше не нужна."""
+    old_image = getattr(instance, '_replaced_image', None)
+    if old_image:
+        transaction.on_commit(lambda: release_image(old_image))
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    """После удаления поста удаляет его картинку, если она больше не нужна."""
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_save, sender=Post)
+def announce_new_post(sender, instance, created, **kwargs):
+    """Сообщает открытым лентам о новом посте после фиксации транзакции."""
+    if created:
+        transaction.on_commit(lambda: live.publish_post(instance))
+
+
+@receiver(post_save, sender=Comment)
+def announce_new_comment(sender, instance, created, **kwargs):
+    """Отправляет новый комментарий открытым страницам поста."""
+    if created:
+        transaction.on_commit(lambda: live.publish_comment(instance))
+
+
+@receiver(post_save, sender=Post)
+def update_post_tags(sender, instance, **kwargs):
+    """Приводит хештеги поста в соответствие с его текстом."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'text', 'pub_date'} & set(
+        update_fields
+    ):
+        return
+    tags.tag_posts([(instance.pk, instance.text, instance.pub_date)])
+
+
+@receiver(post_save, sender=Post)
+def notify_post_mentions(sender, instance, update_fields, **kwargs):
+    """Уведомляет пользователей, впервые упомянутых в посте."""
+    if update_fields is None or 'text' in update_fields:
+        mentions.notify(instance)
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment_mentions(sender, instance, created, **kwargs):
+    """Уведомляет пользователей, упомянутых в новом комментарии."""
+    if created:
+        mentions.notify(instance.post, instance)
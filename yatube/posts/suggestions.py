@@ -0,0 +1,126 @@
+"""Рекомендации «кого почитать».
+
+Рекомендации пересчитываются пакетно командой build_follow_suggestions
+и хранятся в FollowSuggestion, так что страницы читают их одним запросом
+по индексу (user, -score).
+"""
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import transaction
+
+from yatube.settings import SUGGESTIONS_PER_USER, SUGGESTIONS_SHOWN
+from . import follow_graph
+from .models import Follow, FollowSuggestion, Post, User
+
+# Вес общего сообщества относительно одной общей подписки
+GROUP_WEIGHT = 0.5
+# Максимальный вес популярного автора, которым добиваются пустые списки
+POPULAR_WEIGHT = 0.1
+# Сколько подписчиков одного автора просматривается при подсчёте
+MAX_CO_FOLLOWERS = 1000
+
+
+def _load_follow_graph():
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    rows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in rows.iterator():
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    return following, followers
+
+
+def _load_group_membership():
+    author_groups = defaultdict(set)
+    group_authors = defaultdict(set)
+    rows = Post.objects.filter(group__isnull=False).values_list(
+        'author_id', 'group_id'
+    ).distinct()
+    for author_id, group_id in rows.iterator():
+        author_groups[author_id].add(group_id)
+        group_authors[group_id].add(author_id)
+    return author_groups, group_authors
+
+
+def _score(user_id, following, followers, author_groups, group_authors):
+    """Веса кандидатов для одного пользователя.
+
+    Кандидат получает по единице за каждого пользователя, который
+    подписан на него и на кого-то из авторов пользователя, и GROUP_WEIGHT
+    за каждое сообщество, где он пишет вместе с пользователем
+    или его авторами.
+    """
+    scores = Counter()
+    own = following.get(user_id, set())
+    for author_id in own:
+        for other_id in islice(followers[author_id], MAX_CO_FOLLOWERS):
+            if other_id != user_id:
+                scores.update(following[other_id])
+    groups = set(author_groups.get(user_id, ()))
+    for author_id in own:
+        groups |= author_groups.get(author_id, set())
+    for group_id in groups:
+        for author_id in group_authors[group_id]:
+            scores[author_id] += GROUP_WEIGHT
+    for author_id in own | {user_id}:
+        scores.pop(author_id, None)
+    return scores
+
+
+def build_suggestions(limit=SUGGESTIONS_PER_USER, batch_size=500):
+    """Пересчитывает рекомендации всех пользователей.
+
+    Возвращает число сохранённых рекомендаций.
+    """
+    following, followers = _load_follow_graph()
+    author_groups, group_authors = _load_group_membership()
+    popularity = Counter(
+        {author_id: len(ids) for author_id, ids in followers.items()}
+    )
+    top_count = max(popularity.values(), default=1)
+    popular = popularity.most_common(limit * 2)
+
+    total = 0
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    user_ids = user_ids.iterator()
+    while True:
+        batch = list(islice(user_ids, batch_size))
+        if not batch:
+            break
+        rows = []
+        for user_id in batch:
+            scores = _score(
+                user_id, following, followers, author_groups, group_authors
+            )
+            top = scores.most_common(limit)
+            excluded = following.get(user_id, set()) | {user_id}
+            excluded.update(author_id for author_id, _ in top)
+            for author_id, count in popular:
+                if len(top) >= limit:
+                    break
+                if author_id not in excluded:
+                    top.append((author_id, POPULAR_WEIGHT * count / top_count))
+            rows.extend(
+                FollowSuggestion(user_id=user_id, author_id=author_id,
+                                 score=score)
+                for author_id, score in top
+            )
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+        total += len(rows)
+    return total
+
+
+def get_suggestions(user, limit=SUGGESTIONS_SHOWN):
+    """Рекомендованные пользователю авторы, на которых он ещё не подписан."""
+    following = follow_graph.following_ids(user.id)
+    suggestions = FollowSuggestion.objects.filter(
+        user=user
+    ).select_related('author')
+    authors = [
+        suggestion.author for suggestion in suggestions
+        if suggestion.author_id not in following
+    ]
+    return authors[:limit]
@@ -0,0 +1,123 @@
+"""Хештеги в текстах постов.
+
+Хештеги разбираются из текста при сохранении поста и хранятся
+в таблицах Tag и PostTag. В PostTag продублирована дата поста, поэтому
+лента тега — это чтение индекса (tag, -pub_date, -post) с курсором
+вместо смещения: страница стоит одинаково на любой глубине.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Q
+
+from .markup import HASHTAG_RE
+from .models import Post, PostTag, Tag
+
+CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def extract_tags(text):
+    """Множество хештегов текста без # в нижнем регистре."""
+    return {name.lower() for name in HASHTAG_RE.findall(text)}
+
+
+def _get_tags(names):
+    """Теги по именам; недостающие создаются одним запросом."""
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = set(names) - set(tags)
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True
+        )
+        tags.update(
+            (tag.name, tag) for tag in Tag.objects.filter(name__in=missing)
+        )
+    return tags
+
+
+def tag_posts(posts):
+    """Приводит хештеги постов в соответствие с их текстами.
+
+    posts — последовательность (id, текст, дата публикации). Число
+    запросов не зависит от числа постов и хештегов.
+    """
+    wanted = {
+        post_id: (extract_tags(text), pub_date)
+        for post_id, text, pub_date in posts
+    }
+    tags = _get_tags(set().union(*(names for names, _ in wanted.values())))
+    desired = {
+        (post_id, tags[name].pk)
+        for post_id, (names, _) in wanted.items() for name in names
+    }
+    existing = {
+        (link.post_id, link.tag_id): link
+        for link in PostTag.objects.filter(post_id__in=wanted).only(
+            'post_id', 'tag_id', 'pub_date'
+        )
+    }
+    obsolete = set(existing) - desired
+    if obsolete:
+        condition = Q()
+        for post_id, tag_id in obsolete:
+            condition |= Q(post_id=post_id, tag_id=tag_id)
+        PostTag.objects.filter(condition).delete()
+    PostTag.objects.bulk_create([
+        PostTag(post_id=post_id, tag_id=tag_id, pub_date=wanted[post_id][1])
+        for post_id, tag_id in desired - set(existing)
+    ])
+    # Дата поста могла измениться в обход сохранения модели
+    stale = []
+    for key in desired & set(existing):
+        link = existing[key]
+        if link.pub_date != wanted[link.post_id][1]:
+            link.pub_date = wanted[link.post_id][1]
+            stale.append(link)
+    if stale:
+        PostTag.objects.bulk_update(stale, ['pub_date'])
+
+
+def encode_cursor(pub_date, post_id):
+    """Курсор позиции в ленте: дата поста в UTC и его id."""
+    moment = pub_date.astimezone(dt_timezone.utc).strftime(CURSOR_FORMAT)
+    return f'{moment}.{post_id}'
+
+
+def decode_cursor(cursor):
+    """Дата и id поста из курсора или None, если курсор испорчен."""
+    try:
+        moment, post_id = cursor.split('.')
+        pub_date = datetime.strptime(moment, CURSOR_FORMAT)
+        return pub_date.replace(tzinfo=dt_timezone.utc), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def tag_feed(tag, cursor=None, limit=10):
+    """Страница ленты тега после курсора.
+
+    Возвращает посты и курсор следующей страницы (None, если её нет).
+    """
+    links = PostTag.objects.filter(tag=tag)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        pub_date, post_id = position
+        links = links.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id)
+        )
+    page = list(
+        links.order_by('-pub_date', '-post_id').values_list(
+            'post_id', 'pub_date'
+        )[:limit + 1]
+    )
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        last_post_id, last_pub_date = page[-1]
+        next_cursor = encode_cursor(last_pub_date, last_post_id)
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for post_id, _ in page]
+    )
+    return [posts[post_id] for post_id, _ in page if post_id in posts], (
+        next_cursor
+    )
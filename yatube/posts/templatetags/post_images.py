@@ -0,0 +1,30 @@
+from django import template
+
+from posts.renditions import prefetch_renditions
+
+register = template.Library()
+
+PREFETCHED_CONTEXT_KEY = 'prefetched_pictures'
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_pictures(context, posts):
+    """Готовит версии картинок всех постов страницы одним запросом к кешу.
+
+    Тег ставится перед циклом по постам; post_picture затем берёт
+    описания из контекста, не обращаясь к кешу для каждого поста.
+    """
+    context[PREFETCHED_CONTEXT_KEY] = prefetch_renditions(
+        post.image for post in posts
+    )
+    return ''
+
+
+@register.inclusion_tag('posts/includes/picture.html', takes_context=True)
+def post_picture(context, image):
+    if not image:
+        return {'picture': None}
+    prefetched = context.get(PREFETCHED_CONTEXT_KEY) or {}
+    if image.name not in prefetched:
+        prefetched = prefetch_renditions([image])
+    return {'picture': prefetched[image.name]}
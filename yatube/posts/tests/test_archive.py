@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post
+from posts.rollups import roll_up
+
+User = get_user_model()
+
+
+def aware(year, month, day):
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        for text, published, group in (
+            ('Январский пост', aware(2022, 1, 31), cls.group),
+            ('Февральский пост', aware(2022, 2, 1), None),
+            ('Новогодний пост', aware(2021, 12, 31), cls.group),
+        ):
+            post = Post.objects.create(
+                author=cls.author, text=text, group=group
+            )
+            Post.objects.filter(pk=post.pk).update(pub_date=published)
+        roll_up()
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_month_shows_only_its_posts(self):
+        """В архиве месяца только посты этого месяца."""
+        pages = {
+            reverse('posts:archive', args=[2022, 1]): 1,
+            reverse('posts:author_archive', args=['Author', 2022, 2]): 1,
+            reverse('posts:group_archive', args=['test-slug', 2021, 12]): 1,
+            reverse('posts:group_archive', args=['test-slug', 2022, 2]): 0,
+        }
+        for url, expected in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(len(response.context['page_obj']), expected)
+
+    def test_month_selected_by_date_range(self):
+        """Посты месяца выбираются диапазоном по дате публикации."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:archive', args=[2022, 1]))
+        post_queries = [
+            query['sql'] for query in queries
+            if 'FROM "posts_post"' in query['sql']
+        ]
+        self.assertTrue(post_queries)
+        for sql in post_queries:
+            self.assertIn('"posts_post"."pub_date" >=', sql)
+            self.assertIn('"posts_post"."pub_date" <', sql)
+
+    def test_calendar_from_rollups(self):
+        """Календарь показывает число постов по месяцам из сводки."""
+        response = self.client.get(reverse('posts:archive'))
+        calendar = response.context['calendar']
+        self.assertEqual([row['year'] for row in calendar], [2022, 2021])
+        counts = [month['count'] for month in calendar[0]['months']]
+        self.assertEqual(counts[:3], [1, 1, 0])
+        self.assertEqual(
+            calendar[0]['months'][0]['url'],
+            reverse('posts:archive', args=[2022, 1])
+        )
+        group_response = self.client.get(
+            reverse('posts:group_archive', args=['test-slug'])
+        )
+        group_counts = [
+            month['count'] for month in group_response.context['calendar'][0][
+                'months'
+            ]
+        ]
+        self.assertEqual(group_counts[:2], [1, 0])
+
+    def test_invalid_month(self):
+        """Несуществующий месяц — страница 404."""
+        response = self.client.get('/archive/2022/13/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,161 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cache import get_post, get_group_or_404, get_group_index
+from posts.models import Post, Group
+
+User = get_user_model()
+
+
+class PostCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostCacheTests.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_post_served_without_queries(self):
+        """Повторное чтение поста не обращается к базе."""
+        get_post(self.post.id)
+        with self.assertNumQueries(0):
+            post = get_post(self.post.id)
+        self.assertEqual(post, self.post)
+        self.assertEqual(post.author.username, 'NoName')
+
+    def test_missing_post_returns_404(self):
+        """Несуществующий пост отдаёт 404 и кешируется как отсутствующий."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 9999}))
+        self.assertEqual(response.status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_post(9999))
+
+    def test_edit_invalidates_cached_post(self):
+        """После редактирования в кеше нет устаревшей версии поста."""
+        get_post(self.post.id)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Изменённый пост'},
+        )
+        self.assertEqual(get_post(self.post.id).text, 'Изменённый пост')
+
+    def test_cached_post_shows_current_author_and_group(self):
+        """Изменения автора и сообщества видны в закешированном посте."""
+        group = Group.objects.create(
+            title='Старое название', slug='old', description='Описание'
+        )
+        post = Post.objects.create(
+            author=self.user, text='Пост в группе', group=group
+        )
+        get_post(post.id)
+        group.title = 'Новое название'
+        group.save()
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        post = get_post(post.id)
+        self.assertEqual(post.group.title, 'Новое название')
+        self.assertEqual(post.author.first_name, 'Новое имя')
+        group.delete()
+        self.assertIsNone(get_post(post.id).group)
+
+    def test_edit_form_reads_post_from_database(self):
+        """Форма правки получает пост из базы, а не из кеша."""
+        get_post(self.post.id)
+        Post.objects.filter(pk=self.post.id).update(text='Текст из базы')
+        response = self.authorized_client.get(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        )
+        self.assertEqual(
+            response.context['form'].initial['text'], 'Текст из базы'
+        )
+
+    def test_delete_invalidates_cached_post(self):
+        """Удалённый пост не отдаётся из кеша."""
+        post = Post.objects.create(author=self.user, text='Удаляемый пост')
+        get_post(post.id)
+        post_id = post.id
+        post.delete()
+        self.assertIsNone(get_post(post_id))
+
+
+class GroupCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(text=f'test_post_{i}', author=cls.user, group=cls.group)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_group_served_without_queries(self):
+        """Повторный поиск сообщества по слагу не обращается к базе."""
+        get_group_or_404('test-group-slug')
+        with self.assertNumQueries(0):
+            group = get_group_or_404('test-group-slug')
+        self.assertEqual(group, self.group)
+
+    def test_group_key_safe_for_memcached(self):
+        """Слаг с любыми символами не попадает в ключ кеша как есть."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            with self.assertRaises(Http404):
+                get_group_or_404('слаг с пробелами')
+
+    def test_group_feed_query_count(self):
+        """Лента сообщества не делает запросов на каждого автора."""
+        get_group_or_404('test-group-slug')
+        # Подсчёт постов для пагинатора и выборка страницы с авторами
+        with self.assertNumQueries(2):
+            self.guest_client.get(
+                reverse('posts:group_list',
+                        kwargs={'slug': 'test-group-slug'}))
+
+    def test_renamed_group_invalidated(self):
+        """После смены слага старый адрес сообщества отдаёт 404."""
+        get_group_or_404('test-group-slug')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-group-slug'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_group_index_counts(self):
+        """Список сообществ содержит число постов и дату последнего."""
+        response = self.guest_client.get(reverse('posts:group_index'))
+        group = response.context['groups'][0]
+        self.assertEqual(group.posts_count, 3)
+        self.assertIsNotNone(group.last_post_date)
+        Post.objects.create(text='Новый пост', author=self.user,
+                            group=self.group)
+        self.assertEqual(get_group_index()[0].posts_count, 4)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from posts import digests
+from posts.digests import send_digests
+from posts.models import DigestRun, Follow, Post
+
+User = get_user_model()
+
+
+class BrokenAfterFirstBackend(EmailBackend):
+    """Отправляет одну пачку, а на следующей падает."""
+    calls = 0
+
+    def send_messages(self, messages):
+        BrokenAfterFirstBackend.calls += 1
+        if BrokenAfterFirstBackend.calls > 1:
+            raise ConnectionRefusedError('Почтовый сервер недоступен')
+        return super().send_messages(messages)
+
+
+@mock.patch.object(digests, 'DIGEST_LAG', 0)
+class PostDigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.other_author = User.objects.create_user(username='Other')
+        cls.followers = [
+            User.objects.create_user(
+                username=f'Follower{number}',
+                email=f'follower{number}@yatube.ru'
+            )
+            for number in range(3)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+        Follow.objects.create(user=cls.followers[0], author=cls.other_author)
+        Post.objects.create(author=cls.author, text='Пост автора')
+        Post.objects.create(author=cls.other_author, text='Пост другого')
+
+    def test_digest_per_follower(self):
+        """Каждый подписчик получает одно письмо с постами своих авторов."""
+        out = StringIO()
+        call_command('send_post_digests', stdout=out)
+        self.assertIn('Отправлено писем: 3', out.getvalue())
+        letters = {message.to[0]: message.body for message in mail.outbox}
+        self.assertEqual(len(letters), 3)
+        self.assertIn('Пост другого', letters['follower0@yatube.ru'])
+        self.assertIn('Пост автора', letters['follower1@yatube.ru'])
+        self.assertNotIn('Пост другого', letters['follower1@yatube.ru'])
+
+    def test_next_digest_skips_sent_posts(self):
+        """Следующая рассылка не повторяет уже отправленные посты."""
+        send_digests()
+        self.assertEqual(DigestRun.objects.get().recipients, 3)
+        mail.outbox.clear()
+        self.assertEqual(send_digests(), 0)
+        Post.objects.create(author=self.other_author, text='Новый пост')
+        self.assertEqual(send_digests(), 1)
+        self.assertIn('Новый пост', mail.outbox[0].body)
+
+    def test_queries_do_not_depend_on_followers(self):
+        """Число запросов не растёт с числом подписчиков."""
+        with CaptureQueriesContext(connection) as few:
+            send_digests()
+        DigestRun.objects.all().delete()
+        for number in range(3, 10):
+            follower = User.objects.create_user(
+                username=f'Follower{number}',
+                email=f'follower{number}@yatube.ru'
+            )
+            Follow.objects.create(user=follower, author=self.author)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(send_digests(), 10)
+        self.assertEqual(len(few), len(many))
+
+    def test_interrupted_digest_resumes(self):
+        """Прерванная рассылка продолжается без повторных писем."""
+        BrokenAfterFirstBackend.calls = 0
+        with mock.patch(
+            'posts.digests.get_connection', BrokenAfterFirstBackend
+        ):
+            with self.assertRaises(ConnectionRefusedError):
+                send_digests(chunk_size=1)
+        run = DigestRun.objects.get()
+        self.assertFalse(run.finished)
+        self.assertEqual(run.recipients, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(send_digests(chunk_size=1), 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [follower.email for follower in self.followers]
+        )
+        self.assertTrue(DigestRun.objects.get().finished)
+
+    def test_late_post_not_skipped(self):
+        """Пост с датой раньше прошлой рассылки попадает в следующую."""
+        send_digests()
+        mail.outbox.clear()
+        post = Post.objects.create(author=self.other_author, text='Поздний')
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(send_digests(), 1)
+        self.assertIn('Поздний', mail.outbox[0].body)
+
+    def test_fresh_posts_wait_for_lag(self):
+        """Посты моложе DIGEST_LAG и все после них ждут следующей рассылки."""
+        send_digests()
+        mail.outbox.clear()
+        fresh = Post.objects.create(author=self.other_author, text='Свежий')
+        older = Post.objects.create(author=self.other_author, text='Старше')
+        Post.objects.filter(pk=older.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=5)
+        )
+        with mock.patch.object(digests, 'DIGEST_LAG', 60):
+            self.assertEqual(send_digests(), 0)
+        Post.objects.filter(pk=fresh.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=5)
+        )
+        with mock.patch.object(digests, 'DIGEST_LAG', 60):
+            self.assertEqual(send_digests(), 1)
+        self.assertIn('Свежий', mail.outbox[0].body)
+        self.assertIn('Старше', mail.outbox[0].body)
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.author2 = User.objects.create_user(username='Author2')
+        cls.author3 = User.objects.create_user(username='Author3')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.user)
+        Follow.objects.create(user=cls.author, author=cls.author2)
+        Follow.objects.create(user=cls.author, author=cls.author3)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowGraphTests.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_following_sets_are_cached(self):
+        """Множество подписок читается из кеша без запросов к базе."""
+        follow_graph.following_ids(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.user.id, self.author.id))
+            self.assertFalse(
+                follow_graph.is_following(self.user.id, self.author2.id))
+
+    def test_follower_count_and_mutuals(self):
+        """Подсчёт подписчиков и взаимных подписок."""
+        self.assertEqual(follow_graph.follower_count(self.author.id), 1)
+        self.assertEqual(
+            follow_graph.mutuals(self.user.id), {self.author.id})
+
+    def test_suggested_authors(self):
+        """Предлагаются авторы, на которых подписаны авторы пользователя."""
+        self.assertEqual(
+            set(follow_graph.suggested_authors(self.user.id)),
+            {self.author2.id, self.author3.id}
+        )
+
+    def test_follow_views_keep_cache_consistent(self):
+        """Подписка и отписка через представления сбрасывают кеш."""
+        self.assertFalse(
+            follow_graph.is_following(self.user.id, self.author2.id))
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'Author2'}))
+        self.assertTrue(
+            follow_graph.is_following(self.user.id, self.author2.id))
+        self.assertEqual(follow_graph.follower_count(self.author2.id), 2)
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'Author2'}))
+        self.assertFalse(
+            follow_graph.is_following(self.user.id, self.author2.id))
+        self.assertEqual(follow_graph.follower_count(self.author2.id), 1)
+
+    def test_large_ids_survive_packing(self):
+        """id больше 2**32 не обрезаются при упаковке множества."""
+        ids = {1, 2 ** 32, 2 ** 40 + 7}
+        self.assertEqual(
+            follow_graph._unpack(follow_graph._pack(ids)), ids)
+
+    def test_missing_sets_loaded_in_chunks(self):
+        """Недостающие множества дочитываются пачками IN (...)."""
+        owners = [self.user.id, self.author.id, self.author2.id]
+        with mock.patch.object(follow_graph, 'IN_CHUNK_SIZE', 2):
+            with self.assertNumQueries(2):
+                sets = follow_graph._get_sets(
+                    follow_graph.FOLLOWING_KEY, 'user_id', 'author_id',
+                    owners
+                )
+        self.assertEqual(sets[self.author.id], {
+            self.user.id, self.author2.id, self.author3.id})
+        self.assertEqual(sets[self.author2.id], frozenset())
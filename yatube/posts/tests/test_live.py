@@ -0,0 +1,128 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import events
+from posts.live import FEED_CHANNEL, comments_channel
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class LiveUpdatesTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(
+            events, 'transport', events.LocalTransport()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='NoName')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+
+    def tearDown(self):
+        cache.clear()
+
+    def read_stream(self, url, last_id):
+        response = Client().get(url, HTTP_LAST_EVENT_ID=str(last_id))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_new_post_published(self):
+        """О новом посте сообщается в канал ленты."""
+        (_, event), = events.pending(FEED_CHANNEL, 0)
+        self.assertEqual(event['type'], 'post')
+        self.assertEqual(event['data']['id'], self.post.pk)
+        self.assertEqual(event['data']['author'], self.user.pk)
+
+    def test_feed_stream_sends_events(self):
+        """Поток ленты отдаёт события в формате text/event-stream."""
+        content = self.read_stream(reverse('posts:feed_events'), 0)
+        self.assertIn('event: post', content)
+        self.assertIn(f'"id": {self.post.pk}', content)
+        self.assertIn('retry: ', content)
+
+    def test_stream_resumes_after_last_event(self):
+        """Переподключившийся клиент не получает уже виденные события."""
+        last_id = events.current_id(FEED_CHANNEL)
+        content = self.read_stream(reverse('posts:feed_events'), last_id)
+        self.assertNotIn('event: post', content)
+        # Номер передаётся, чтобы следующий опрос продолжил с него
+        self.assertIn(f'id: {last_id}\n', content)
+
+    def test_new_client_starts_from_current_event(self):
+        """Клиент без Last-Event-ID получает номер последнего события."""
+        response = Client().get(reverse('posts:feed_events'))
+        content = b''.join(response.streaming_content).decode()
+        self.assertNotIn('event: post', content)
+        self.assertIn(f'id: {events.current_id(FEED_CHANNEL)}\n', content)
+
+    def test_comment_stream_sends_html(self):
+        """На страницу поста приходит разметка нового комментария."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Живой комментарий'
+        )
+        content = self.read_stream(
+            reverse('posts:post_events', args=[self.post.pk]), 0
+        )
+        data = json.loads(
+            content.split('event: comment\ndata: ')[1].split('\n')[0]
+        )
+        self.assertEqual(data['id'], comment.pk)
+        self.assertIn('Живой комментарий', data['html'])
+        self.assertEqual(
+            events.current_id(comments_channel(self.post.pk)), 1
+        )
+
+    def test_pending_in_order(self):
+        """События канала отдаются по порядку номеров."""
+        first = events.publish('channel', 'a', 1)
+        events.publish('channel', 'b', 2)
+        received = events.pending('channel', first - 1)
+        self.assertEqual([event['type'] for _, event in received], ['a', 'b'])
+        self.assertEqual(events.pending('channel', first + 1), [])
+
+    def test_restarted_numbering_replayed(self):
+        """После перезапуска нумерации канал отдаётся с начала."""
+        content = self.read_stream(reverse('posts:feed_events'), 1000)
+        self.assertIn('event: post', content)
+
+    def test_cache_transport_needs_atomic_incr(self):
+        """Транспорт через кеш не работает с кешем без атомарного incr."""
+        with self.assertRaises(ImproperlyConfigured):
+            events.CacheTransport()
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'events-test',
+    }})
+    def test_cache_transport_keys_expire(self):
+        """Ключи каналов в кеше живут ограниченное время."""
+        with mock.patch.object(
+            events, 'ATOMIC_CACHES',
+            ('django.core.cache.backends.locmem.LocMemCache',)
+        ):
+            transport = events.CacheTransport()
+        first = transport.publish('channel', {'type': 'a', 'data': 1})
+        transport.publish('channel', {'type': 'b', 'data': 2})
+        received = transport.pending('channel', first - 1)
+        self.assertEqual([event['type'] for _, event in received], ['a', 'b'])
+        expiry = transport.cache._expire_info
+        self.assertTrue(all(expiry[key] is not None for key in expiry))
+
+    def test_live_updates_behind_button(self):
+        """Лента и пост предлагают включить живые обновления кнопкой."""
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'live-feed-start'
+        )
+        self.assertContains(
+            self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk])
+            ),
+            'live-comments-start'
+        )
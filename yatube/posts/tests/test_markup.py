@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.markup import render_text
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class MarkupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_render_text(self):
+        """Текст экранируется, ссылки, теги и упоминания размечаются."""
+        html = render_text(
+            '<b>**Жирный** и *курсив*</b>\n'
+            'См. https://example.com/a#b, #Тег и @author. @nobody'
+        )
+        self.assertHTMLEqual(
+            html,
+            '<p>&lt;b&gt;<strong>Жирный</strong> и <em>курсив</em>'
+            '&lt;/b&gt;<br>См. <a href="https://example.com/a#b" '
+            'rel="nofollow">https://example.com/a#b</a>, '
+            f'<a href="{reverse("posts:tag", args=["тег"])}">#Тег</a> и '
+            f'<a href="{reverse("posts:profile", args=["author"])}">'
+            '@author</a>. @nobody</p>'
+        )
+
+    def test_html_saved_with_text(self):
+        """HTML готовится при сохранении поста и комментария."""
+        post = Post.objects.create(author=self.author, text='Первый\n\nВторой')
+        self.assertEqual(post.text_html, '<p>Первый</p>\n\n<p>Второй</p>')
+        post.text = 'Новый'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Новый</p>')
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='<script>'
+        )
+        self.assertEqual(comment.text_html, '<p>&lt;script&gt;</p>')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(response, '<p>Новый</p>', html=True)
+        self.assertContains(response, '&lt;script&gt;')
+
+    def test_backfill(self):
+        """Команда заполняет HTML у строк, сохранённых без него."""
+        post = Post.objects.create(author=self.author, text='@author')
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Текст'
+        )
+        Post.objects.update(text_html='')
+        Comment.objects.update(text_html='')
+        call_command('render_texts', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertIn('href', post.text_html)
+        self.assertEqual(comment.text_html, '<p>Текст</p>')
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.management.commands import collect_media_garbage
+from posts.models import Post
+from posts.renditions import renditions_key
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+DAY_AGO = 60 * 60 * 25
+
+
+def make_old_file(name):
+    path = os.path.join(TEMP_MEDIA_ROOT, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as orphan:
+        orphan.write(SMALL_GIF)
+    age = os.path.getmtime(path) - DAY_AGO
+    os.utime(path, (age, age))
+    return path
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CollectMediaGarbageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        os.makedirs(TEMP_MEDIA_ROOT, exist_ok=True)
+        user = User.objects.create_user(username='NoName')
+        self.post = Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+        self.thumbnail = get_thumbnail(self.post.image, '10x10')
+        for path in (self.post.image.path, self.thumbnail.storage.path(
+                self.thumbnail.name)):
+            age = os.path.getmtime(path) - DAY_AGO
+            os.utime(path, (age, age))
+        self.orphan = make_old_file('posts/aa/bb/orphan.gif')
+        self.orphan_thumbnail = make_old_file('cache/aa/bb/orphan.jpg')
+        self.fresh = os.path.join(TEMP_MEDIA_ROOT, 'posts/fresh.gif')
+        with open(self.fresh, 'wb') as fresh:
+            fresh.write(SMALL_GIF)
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('collect_media_garbage', *args, stdout=out)
+        return out.getvalue()
+
+    def assertKeptReferenced(self):
+        self.assertTrue(os.path.exists(self.post.image.path))
+        self.assertTrue(self.thumbnail.exists())
+        self.assertTrue(os.path.exists(self.fresh))
+
+    def test_dry_run_reports_without_deleting(self):
+        """В режиме проверки лишние файлы только выводятся в отчёт."""
+        output = self.run_command('--dry-run')
+        self.assertIn('posts/aa/bb/orphan.gif', output)
+        self.assertIn('cache/aa/bb/orphan.jpg', output)
+        self.assertNotIn(self.post.image.name, output)
+        self.assertTrue(os.path.exists(self.orphan))
+        self.assertTrue(os.path.exists(self.orphan_thumbnail))
+
+    def test_orphans_deleted(self):
+        """Удаляются только файлы, на которые ничто не ссылается."""
+        self.run_command()
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertFalse(os.path.exists(self.orphan_thumbnail))
+        self.assertKeptReferenced()
+
+    def test_orphans_quarantined(self):
+        """В режиме карантина лишние файлы переносятся, а не удаляются."""
+        self.run_command('--quarantine')
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertTrue(os.path.exists(os.path.join(
+            TEMP_MEDIA_ROOT, '.quarantine/posts/aa/bb/orphan.gif')))
+        self.assertKeptReferenced()
+
+    def test_quarantine_rechecks_references(self):
+        """Перед переносом ссылка на картинку проверяется ещё раз."""
+        # Пост сослался на картинку уже после сверки пачки
+        with mock.patch.object(
+            collect_media_garbage, 'referenced_images', return_value=set()
+        ):
+            self.run_command('--quarantine')
+        self.assertKeptReferenced()
+        self.assertFalse(os.path.exists(self.orphan))
+
+    def test_quarantine_clears_thumbnail_records(self):
+        """Перенесённая картинка пропадает из хранилища ключей и кеша."""
+        name = 'posts/aa/bb/orphan.gif'
+        image = ImageFile(name, Post._meta.get_field('image').storage)
+        get_thumbnail(image, '10x10')
+        cache.set(renditions_key(name), {'src': '/media/cache/orphan.jpg'})
+        self.run_command('--quarantine')
+        self.assertIsNone(default.kvstore.get(image))
+        self.assertIsNone(cache.get(renditions_key(name)))
+
+    def test_resumes_from_saved_position(self):
+        """Обход продолжается с места, сохранённого прошлым запуском."""
+        with open(os.path.join(TEMP_MEDIA_ROOT, '.media_gc.json'),
+                  'w') as state:
+            json.dump({'posts': 'posts/aa/bb/orphan.gif'}, state)
+        self.run_command()
+        self.assertTrue(os.path.exists(self.orphan))
+        self.assertFalse(os.path.exists(self.orphan_thumbnail))
+        self.assertFalse(os.path.exists(
+            os.path.join(TEMP_MEDIA_ROOT, '.media_gc.json')))
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+
+from posts.images import release_image
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def make_gif(name='small.gif', content=SMALL_GIF):
+    return SimpleUploadedFile(
+        name=name, content=content, content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.images.IMAGE_RELEASE_GRACE', 0)
+class ContentAddressedStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='NoName')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(
+            author=self.user, text='Тестовый пост', image=image
+        )
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом в шардированном пути."""
+        first = self.create_post(make_gif('one.gif'))
+        second = self.create_post(make_gif('two.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}'
+            r'\.gif$'
+        )
+        files = [
+            name for _, _, names in os.walk(TEMP_MEDIA_ROOT)
+            for name in names if not name.startswith('.')
+        ]
+        self.assertEqual(len(files), 1)
+
+    def test_shared_image_kept_until_last_post_deleted(self):
+        """Картинка удаляется вместе с последним ссылающимся постом."""
+        first = self.create_post(make_gif())
+        second = self.create_post(make_gif())
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_replaced_image_removed(self):
+        """При замене картинки прежний файл удаляется."""
+        post = self.create_post(make_gif())
+        old_path = post.image.path
+        post.image = make_gif(content=SMALL_GIF + b'\x00')
+        post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(post.image.path))
+
+    def test_reuploaded_image_not_released(self):
+        """Только что загруженный заново файл не удаляется с последним постом.
+
+        Второй пост мог сохранить файл, но ещё не попасть в базу.
+        """
+        post = self.create_post(make_gif())
+        path = post.image.path
+        old = time.time() - 60 * 60 * 2
+        os.utime(path, (old, old))
+        Post._meta.get_field('image').storage.save('posts/x.gif', make_gif())
+        with mock.patch('posts.images.IMAGE_RELEASE_GRACE', 60 * 60):
+            post.delete()
+            self.assertTrue(os.path.exists(path))
+            os.utime(path, (old, old))
+            release_image(post.image.name)
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.markup import extract_mentions
+from posts.mentions import unread_count
+from posts.models import Comment, Mention, Post
+
+User = get_user_model()
+
+
+class MentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_extract_mentions(self):
+        """Имена разбираются без точки в конце и без почтовых адресов."""
+        self.assertEqual(
+            extract_mentions('Привет, @reader. И @j.doe! me@mail.ru'),
+            {'reader', 'j.doe'}
+        )
+
+    def test_constant_queries(self):
+        """Число запросов не зависит от числа упомянутых."""
+        users = User.objects.bulk_create([
+            User(username=f'user{number}') for number in range(50)
+        ])
+
+        def save_post(names):
+            post = Post(
+                author=self.author,
+                text=' '.join(f'@{user.username}' for user in names)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                post.save()
+            return len(queries)
+
+        self.assertEqual(save_post(users[:1]), save_post(users))
+        self.assertEqual(Mention.objects.count(), 51)
+
+    def test_usernames_resolved_once(self):
+        """Имена из текста ищутся одним запросом на разметку и уведомления."""
+        post = Post(author=self.author, text='Привет, @reader')
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        user_queries = [
+            query for query in queries
+            if '"username" IN' in query['sql']
+        ]
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn('/profile/reader/', post.text_html)
+        self.assertTrue(Mention.objects.filter(user=self.reader).exists())
+
+    def test_edit_notifies_only_new_mentions(self):
+        """При правке поста повторно уведомления не создаются."""
+        post = Post.objects.create(author=self.author, text='@reader')
+        post.text = '@reader @author снова'
+        post.save()
+        self.assertEqual(Mention.objects.filter(user=self.reader).count(), 1)
+        self.assertFalse(Mention.objects.filter(user=self.author).exists())
+
+    def test_inbox_marks_read(self):
+        """Число непрочитанных в шапке, страница упоминаний их читает."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.author, text='@reader')
+        self.assertEqual(unread_count(self.reader.pk), 1)
+        client = self.client_class()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_mentions'], 1)
+        response = client.get(reverse('posts:mentions'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertFalse(response.context['page_obj'][0].is_read)
+        self.assertEqual(unread_count(self.reader.pk), 0)
+        self.assertFalse(
+            Mention.objects.filter(user=self.reader, is_read=False).exists()
+        )
+
+    def test_inbox_marks_only_shown_page(self):
+        """Прочитанными становятся только упоминания открытой страницы."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        for _ in range(settings.NUMBER_OF_POSTS + 2):
+            Comment.objects.create(
+                post=post, author=self.author, text='@reader'
+            )
+        client = self.client_class()
+        client.force_login(self.reader)
+        client.get(reverse('posts:mentions'))
+        self.assertEqual(unread_count(self.reader.pk), 2)
+        client.get(reverse('posts:mentions') + '?page=2')
+        self.assertEqual(unread_count(self.reader.pk), 0)
@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Post
+from posts.images import delete_image
+from posts.renditions import (
+    MODERN_FORMATS, get_renditions, prefetch_renditions, renditions_key
+)
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'lightskyblue').save(buffer, 'PNG')
+    return SimpleUploadedFile(
+        name='big.png', content=buffer.getvalue(), content_type='image/png'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class RenditionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=make_image(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_renditions_cover_all_widths(self):
+        """Для картинки создаются версии всех заданных ширин."""
+        picture = get_renditions(self.post.image)
+        for width in settings.IMAGE_RENDITION_WIDTHS:
+            with self.subTest(width=width):
+                self.assertIn(f' {width}w', picture['srcset'])
+        self.assertEqual(picture['width'], 960)
+        self.assertEqual(picture['height'], 339)
+
+    def test_each_rendition_built_once(self):
+        """Каждая версия создаётся одним вызовом get_thumbnail."""
+        with mock.patch(
+            'posts.renditions.get_thumbnail', wraps=get_thumbnail
+        ) as spy:
+            get_renditions(self.post.image)
+        calls = [
+            (call.args[1], call.kwargs['format'])
+            for call in spy.call_args_list
+        ]
+        self.assertEqual(len(calls), len(set(calls)))
+        self.assertEqual(len(calls), len(settings.IMAGE_RENDITION_WIDTHS) * (
+            1 + len(MODERN_FORMATS)))
+
+    def test_post_without_image(self):
+        """У поста без картинки нет версий."""
+        self.assertIsNone(get_renditions(None))
+
+    def test_feed_renders_srcset(self):
+        """Лента выводит картинку с srcset."""
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'srcset=')
+
+    def test_benchmark_command(self):
+        """Команда сравнения объёма картинок отчитывается об экономии."""
+        out = StringIO()
+        call_command('benchmark_renditions', stdout=out)
+        self.assertIn('экономия', out.getvalue())
+
+    def test_prefetch_reads_cache_once(self):
+        """Версии картинок страницы читаются из кеша одним запросом."""
+        prefetch_renditions([self.post.image])
+        with mock.patch('posts.renditions.get_thumbnail') as get_thumbnail:
+            with mock.patch.object(
+                cache, 'get_many', wraps=cache.get_many
+            ) as get_many:
+                response = Client().get(
+                    reverse('posts:profile', args=[self.user.username])
+                )
+        self.assertContains(response, '<picture>')
+        get_thumbnail.assert_not_called()
+        rendition_calls = [
+            call for call in get_many.call_args_list
+            if renditions_key(self.post.image.name) in call[0][0]
+        ]
+        self.assertEqual(len(rendition_calls), 1)
+
+    def test_delete_image_invalidates_renditions(self):
+        """Удаление картинки убирает из кеша описание её версий."""
+        storage = Post._meta.get_field('image').storage
+        post = Post.objects.create(
+            author=self.user, text='Другой пост', image=make_image((700, 500))
+        )
+        prefetch_renditions([post.image])
+        self.assertIsNotNone(cache.get(renditions_key(post.image.name)))
+        delete_image(post.image.name)
+        self.assertIsNone(cache.get(renditions_key(post.image.name)))
+        self.assertFalse(storage.exists(post.image.name))
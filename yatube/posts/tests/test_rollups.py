@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import rollups
+from posts.models import (
+    AuthorDailyStats, Comment, Follow, Group, GroupDailyStats, Post
+)
+from posts.rollups import roll_up
+
+User = get_user_model()
+
+
+@mock.patch.object(rollups, 'ROLLUP_LAG', 0)
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text='Пост', group=cls.group
+            )
+            for _ in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_rollup_counts_new_rows(self):
+        """Задача раскладывает новые строки по дневным счётчикам."""
+        out = StringIO()
+        call_command('build_rollups', '--batch-size', '2', stdout=out)
+        self.assertIn('posts: 3', out.getvalue())
+        today = timezone.localdate()
+        author_day = AuthorDailyStats.objects.get(
+            author=self.author, day=today
+        )
+        self.assertEqual(
+            (author_day.posts, author_day.comments, author_day.new_followers),
+            (3, 0, 1)
+        )
+        reader_day = AuthorDailyStats.objects.get(author=self.reader)
+        self.assertEqual(reader_day.comments, 1)
+        group_day = GroupDailyStats.objects.get(group=self.group, day=today)
+        self.assertEqual((group_day.posts, group_day.comments), (3, 1))
+
+    def test_rollup_is_incremental(self):
+        """Повторный запуск учитывает только строки после отметки."""
+        roll_up()
+        self.assertEqual(
+            roll_up(), {'posts': 0, 'comments': 0, 'follows': 0}
+        )
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(roll_up()['posts'], 1)
+        self.assertEqual(
+            AuthorDailyStats.objects.get(author=self.author).posts, 4
+        )
+        self.assertEqual(GroupDailyStats.objects.get().posts, 3)
+
+    def test_fresh_rows_wait_for_lag(self):
+        """Строки моложе ROLLUP_LAG и все после них ждут следующего запуска."""
+        roll_up()
+        fresh = Post.objects.create(author=self.author, text='Свежий')
+        older = Post.objects.create(author=self.author, text='Ещё пост')
+        Post.objects.filter(pk=older.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=5)
+        )
+        with mock.patch.object(rollups, 'ROLLUP_LAG', 60):
+            self.assertEqual(roll_up()['posts'], 0)
+        Post.objects.filter(pk=fresh.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=5)
+        )
+        with mock.patch.object(rollups, 'ROLLUP_LAG', 60):
+            self.assertEqual(roll_up()['posts'], 2)
+
+    def test_followers_counted_by_follow_date(self):
+        """Подписчик засчитывается в день подписки, а не в день запуска."""
+        Follow.objects.update(created=timezone.now() - timedelta(days=3))
+        roll_up()
+        day = timezone.localdate() - timedelta(days=3)
+        self.assertEqual(
+            AuthorDailyStats.objects.get(
+                author=self.author, day=day
+            ).new_followers,
+            1
+        )
+
+    def test_stats_pages_read_only_rollups(self):
+        """Страницы статистики не обращаются к постам и комментариям."""
+        roll_up()
+        pages = (
+            reverse('posts:author_stats', args=[self.author.username]),
+            reverse('posts:group_stats', args=[self.group.slug]),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['totals'][0], 3)
+                for query in queries:
+                    self.assertNotIn('"posts_post"', query['sql'])
+                    self.assertNotIn('"posts_comment"', query['sql'])
+
+    def test_stats_page_shows_recent_days(self):
+        """Строки — за последние STATS_DAYS дней, итог — за всё время."""
+        today = timezone.localdate()
+        AuthorDailyStats.objects.bulk_create([
+            AuthorDailyStats(
+                author=self.author, day=today - timedelta(days=days), posts=1
+            )
+            for days in (0, 29, 30, 100)
+        ])
+        response = self.client.get(
+            reverse('posts:author_stats', args=[self.author.username])
+        )
+        self.assertEqual(
+            [day for day, _ in response.context['rows']],
+            [today, today - timedelta(days=29)]
+        )
+        self.assertEqual(response.context['totals'][0], 4)
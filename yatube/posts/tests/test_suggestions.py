@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, FollowSuggestion, Group, Post
+from posts.suggestions import build_suggestions, get_suggestions
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+        cls.other = User.objects.create_user(username='OtherReader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.co_followed = User.objects.create_user(username='CoFollowed')
+        cls.group_mate = User.objects.create_user(username='GroupMate')
+        cls.newbie = User.objects.create_user(username='Newbie')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.author, text='Пост', group=group)
+        Post.objects.create(author=cls.group_mate, text='Пост', group=group)
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Follow.objects.create(user=cls.other, author=cls.author)
+        Follow.objects.create(user=cls.other, author=cls.co_followed)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowSuggestionTests.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_co_follow_and_group_suggestions(self):
+        """Рекомендуются соподписки и соседи по сообществу."""
+        build_suggestions()
+        suggested = [
+            author.username for author in get_suggestions(self.user)
+        ]
+        self.assertEqual(suggested[:2], ['CoFollowed', 'GroupMate'])
+        self.assertNotIn('Author', suggested)
+        self.assertNotIn('Reader', suggested)
+
+    def test_new_user_gets_popular_authors(self):
+        """Пользователю без подписок предлагаются популярные авторы."""
+        build_suggestions()
+        suggested = get_suggestions(self.newbie)
+        self.assertEqual(suggested[0], self.author)
+
+    def test_suggestions_shown_on_follow_page(self):
+        """Рекомендации читаются одним запросом и видны в ленте подписок."""
+        call_command('build_follow_suggestions', stdout=StringIO())
+        self.assertTrue(FollowSuggestion.objects.filter(user=self.user))
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(self.co_followed, response.context['suggestions'])
+
+    def test_followed_author_hidden_from_suggestions(self):
+        """Автор, на которого подписались после пересчёта, не предлагается."""
+        build_suggestions()
+        Follow.objects.create(user=self.user, author=self.co_followed)
+        self.assertNotIn(self.co_followed, get_suggestions(self.user))
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, PostTag, Tag
+from posts.tags import decode_cursor, extract_tags, tag_feed
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = self.client_class()
+        self.authorized_client.force_login(self.author)
+
+    def tearDown(self):
+        cache.clear()
+
+    def post_tags(self, post):
+        return set(
+            PostTag.objects.filter(post=post).values_list(
+                'tag__name', flat=True
+            )
+        )
+
+    def test_extract_tags(self):
+        """Хештеги разбираются без учёта регистра, якоря и сущности — нет."""
+        self.assertEqual(
+            extract_tags('#Django и #джанго, a#b &#39; ##x #django'),
+            {'django', 'джанго'}
+        )
+        self.assertEqual(
+            extract_tags(f'#{"a" * 51} #{"b" * 50}'), {'b' * 50}
+        )
+
+    def test_save_without_text_skips_tags(self):
+        """Сохранение без текста и даты не трогает хештеги поста."""
+        post = Post.objects.create(author=self.author, text='Пост #один')
+        with CaptureQueriesContext(connection) as queries:
+            post.save(update_fields=['group'])
+        for query in queries:
+            self.assertNotIn('"posts_posttag"', query['sql'])
+        post.text = 'Пост #два'
+        post.save(update_fields=['text'])
+        self.assertEqual(self.post_tags(post), {'два'})
+
+    def test_tags_follow_post_edits(self):
+        """Хештеги поста обновляются при создании и правке."""
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Пост #один #два'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(self.post_tags(post), {'один', 'два'})
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Пост #два #три'}
+        )
+        self.assertEqual(self.post_tags(post), {'два', 'три'})
+        self.assertEqual(Tag.objects.count(), 3)
+
+    def test_feed_pages_by_cursor(self):
+        """Лента тега листается курсором без пропусков и повторов."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'#лента {number}')
+            for number in range(5)
+        ]
+        # У двух постов одинаковая дата: порядок решает id
+        same = timezone.now() - timedelta(days=1)
+        Post.objects.filter(pk__in=[posts[1].pk, posts[2].pk]).update(
+            pub_date=same
+        )
+        call_command('retag_posts', batch_size=2, stdout=StringIO())
+        tag = Tag.objects.get(name='лента')
+        seen, cursor = [], None
+        while True:
+            page, cursor = tag_feed(tag, cursor, limit=2)
+            seen.extend(post.pk for post in page)
+            if cursor is None:
+                break
+            self.assertIsNotNone(decode_cursor(cursor))
+        expected = [
+            post.pk for post in Post.objects.order_by('-pub_date', '-pk')
+        ]
+        self.assertEqual(seen, expected)
+
+    def test_tag_page(self):
+        """Страница тега показывает посты и ссылку на следующую страницу."""
+        for number in range(11):
+            Post.objects.create(author=self.author, text=f'#Тег {number}')
+        response = self.client.get(reverse('posts:tag', args=['ТЕГ']))
+        self.assertEqual(len(response.context['posts']), 10)
+        next_cursor = response.context['next_cursor']
+        self.assertContains(response, f'?after={next_cursor}')
+        response = self.client.get(
+            reverse('posts:tag', args=['тег']), {'after': next_cursor}
+        )
+        self.assertEqual(len(response.context['posts']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_unknown_tag_not_found(self):
+        response = self.client.get(reverse('posts:tag', args=['нет']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,112 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Comment, Follow, Group, Post, TrendingScore
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group-slug',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(author=cls.user, text='Тихий')
+        cls.hot_post = Post.objects.create(
+            author=cls.user, text='Обсуждаемый', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_comments_raise_post_and_group(self):
+        """Комментарии поднимают пост и его сообщество в рейтинге."""
+        Comment.objects.create(post=self.quiet_post, author=self.user,
+                               text='Комментарий')
+        for _ in range(2):
+            Comment.objects.create(post=self.hot_post, author=self.user,
+                                   text='Комментарий')
+        self.assertEqual(
+            trending.top_post_ids(), [self.hot_post.id, self.quiet_post.id]
+        )
+        self.assertEqual(trending.top_group_ids(5), [self.group.id])
+
+    def test_follow_raises_latest_author_post(self):
+        """Подписка поднимает последний пост автора."""
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(trending.top_post_ids(), [post.id])
+
+    def test_old_events_decay(self):
+        """Давние комментарии весят меньше свежих."""
+        now = time.time()
+        comment = Comment(post=self.quiet_post, author=self.user)
+        for _ in range(3):
+            trending.record_comment(comment, now=now)
+        hot_comment = Comment(post=self.hot_post, author=self.user)
+        later = now + trending.TRENDING_HALF_LIFE * 2
+        trending.record_comment(hot_comment, now=later)
+        self.assertEqual(trending.top_post_ids()[0], self.hot_post.id)
+
+    def test_compaction_bounds_board_size(self):
+        """Уплотнение оставляет не больше заданного числа записей."""
+        with mock.patch.object(trending, 'TRENDING_MAX_ITEMS', 3):
+            for post_id in range(1, 10):
+                trending._record(float(post_id), post_id=post_id)
+            trending.compact()
+        self.assertEqual(
+            sorted(TrendingScore.objects.values_list(
+                'object_id', flat=True
+            )),
+            [7, 8, 9]
+        )
+
+    def test_scores_survive_cache_loss(self):
+        """Рейтинг хранится в базе, кеш лишь ускоряет его чтение."""
+        for _ in range(2):
+            Comment.objects.create(post=self.hot_post, author=self.user,
+                                   text='Комментарий')
+        self.assertEqual(trending.top_post_ids(), [self.hot_post.id])
+        cache.clear()
+        Comment.objects.create(post=self.quiet_post, author=self.user,
+                               text='Комментарий')
+        self.assertEqual(
+            trending.top_post_ids(), [self.hot_post.id, self.quiet_post.id]
+        )
+
+    def test_trending_page_ordered_and_paginated(self):
+        """Страница популярного выводит посты в порядке рейтинга."""
+        Comment.objects.create(post=self.hot_post, author=self.user,
+                               text='Комментарий')
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.hot_post]
+        )
+        self.assertEqual(
+            response.context['trending_groups'], [self.group]
+        )
+
+    def test_deleted_post_leaves_ranking(self):
+        """Удалённый пост сразу пропадает из рейтинга."""
+        post = Post.objects.create(author=self.user, text='Удаляемый')
+        Comment.objects.create(post=post, author=self.user, text='Тоже')
+        self.assertIn(post.id, trending.top_post_ids())
+        post_id = post.id
+        post.delete()
+        self.assertNotIn(post_id, trending.top_post_ids())
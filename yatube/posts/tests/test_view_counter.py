@@ -0,0 +1,137 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import view_counter
+from posts.cache import get_post
+from posts.models import Post, PostViewStats
+
+User = get_user_model()
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='NoName')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        view_counter.pending_views.clear()
+        view_counter.pending_visitors.clear()
+
+    def tearDown(self):
+        view_counter.pending_views.clear()
+        view_counter.pending_visitors.clear()
+
+    def test_views_buffered_until_flush(self):
+        """Просмотры видны на странице сразу, а в базу пишутся пакетом."""
+        url = reverse('posts:post_detail', args=[self.posts[0].pk])
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        self.client.get(url)
+        authorized_client.get(url)
+        response = authorized_client.get(url)
+        self.assertEqual(
+            response.context['view_stats'], {'views': 3, 'visitors': 2}
+        )
+        self.assertFalse(PostViewStats.objects.exists())
+        view_counter.flush()
+        stats = PostViewStats.objects.get()
+        self.assertEqual(stats.views, 3)
+        self.assertEqual(stats.unique_visitors, 2)
+
+    def test_flush_batches_posts(self):
+        """Просмотры всех постов записываются постоянным числом запросов."""
+        for post in self.posts:
+            for visitor in ('a', 'b'):
+                view_counter.record_view(post.pk, visitor)
+        with self.assertNumQueries(7):
+            self.assertEqual(view_counter.flush(), 3)
+        view_counter.record_view(self.posts[0].pk, 'c')
+        view_counter.record_view(self.posts[0].pk, 'a')
+        view_counter.flush()
+        stats = PostViewStats.objects.get(post=self.posts[0])
+        self.assertEqual(stats.views, 4)
+        self.assertEqual(stats.unique_visitors, 3)
+
+    def test_deleted_post_skipped(self):
+        """Просмотры удалённого поста при записи отбрасываются."""
+        post = Post.objects.create(author=self.user, text='Удалённый')
+        view_counter.record_view(post.pk, 'a')
+        post.delete()
+        self.assertEqual(view_counter.flush(), 0)
+        self.assertFalse(PostViewStats.objects.exists())
+
+    def test_failed_flush_keeps_views(self):
+        """Просмотры, которые не удалось записать, остаются в буфере."""
+        view_counter.record_view(self.posts[0].pk, 'a')
+        with mock.patch.object(
+            PostViewStats.objects, 'bulk_create', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                view_counter.flush()
+        view_counter.record_view(self.posts[0].pk, 'b')
+        self.assertEqual(view_counter.flush(), 1)
+        stats = PostViewStats.objects.get()
+        self.assertEqual(stats.views, 2)
+        self.assertEqual(stats.unique_visitors, 2)
+
+    def test_stats_updated_in_cache(self):
+        """Запись обновляет статистику в кеше, не сбрасывая пост."""
+        view_counter.record_view(self.posts[0].pk, 'a')
+        view_counter.flush()
+        post = get_post(self.posts[0].pk)
+        view_counter.record_view(self.posts[0].pk, 'b')
+        with self.assertNumQueries(0):
+            stats = view_counter.get_view_stats(get_post(post.pk))
+        self.assertEqual(stats, {'views': 2, 'visitors': 2})
+        view_counter.flush()
+        with self.assertNumQueries(0):
+            stats = view_counter.get_view_stats(get_post(post.pk))
+        self.assertEqual(stats, {'views': 2, 'visitors': 2})
+
+    def test_flush_chunks_parameters(self):
+        """Большой буфер пишется частями, укладываясь в лимит SQLite."""
+        posts = Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {number}')
+            for number in range(400)
+        )
+        post_ids = Post.objects.values_list('pk', flat=True)
+        for post_id in post_ids:
+            view_counter.record_view(post_id, 'a')
+        self.assertEqual(view_counter.flush(), len(posts) + 3)
+        self.assertEqual(
+            PostViewStats.objects.filter(views=1).count(), len(posts) + 3
+        )
+
+    def test_flushed_in_background(self):
+        """Просмотры записывает фоновый поток, а не запросы."""
+        with mock.patch.object(view_counter, 'VIEWS_FLUSH_INTERVAL', 60):
+            view_counter.record_view(self.posts[0].pk, 'a')
+        self.client.get(reverse('posts:index'))
+        self.assertFalse(PostViewStats.objects.exists())
+        with mock.patch.object(view_counter, 'VIEWS_FLUSH_INTERVAL', 0):
+            with mock.patch.object(
+                view_counter.time, 'sleep', side_effect=[None, SystemExit]
+            ):
+                with self.assertRaises(SystemExit):
+                    view_counter.flush_periodically()
+        self.assertEqual(PostViewStats.objects.get().views, 1)
+
+    def test_admin_shows_stats(self):
+        """Статистика просмотров видна в админке."""
+        view_counter.record_view(self.posts[0].pk, 'a')
+        view_counter.flush()
+        admin = User.objects.create_superuser('admin', 'a@yatube.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_postviewstats_changelist')
+        )
+        self.assertContains(response, 'Уникальных читателей')
@@ -299,6 +299,7 @@ class FollowTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.authorized_flw_client = Client()
         self.authorized_flw_client.force_login(FollowTests.user_follower)
         self.authorized_notflw_client = Client()
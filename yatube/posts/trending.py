@@ -0,0 +1,136 @@
+"""Популярные посты и сообщества.
+
+Рейтинги хранятся в таблице TrendingScore и обновляются при создании
+Comment и Follow. Вес события затухает экспоненциально с периодом
+полураспада TRENDING_HALF_LIFE. Строка хранит рейтинг на момент своего
+последнего события; новое событие одним UPDATE приводит его к текущему
+моменту и прибавляет свой вес, поэтому одновременные события из разных
+процессов не теряют друг друга. Раз в TRENDING_COMPACT_INTERVAL мелкие
+записи удаляются и остаётся не больше TRENDING_MAX_ITEMS записей
+каждого вида.
+
+Готовый порядок кешируется на TRENDING_CACHE_TIMEOUT секунд; кеш можно
+потерять, он собирается заново из таблицы.
+"""
+import math
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Exp
+
+from yatube.settings import (
+    TRENDING_CACHE_TIMEOUT, TRENDING_COMPACT_INTERVAL, TRENDING_HALF_LIFE,
+    TRENDING_MAX_ITEMS
+)
+from .models import Post, TrendingScore
+
+RANKING_KEY = 'posts:trending:{}'
+COMPACT_KEY = 'posts:trending:compacted'
+DECAY = math.log(2) / TRENDING_HALF_LIFE
+
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 2.0
+# Веса меньше этого после затухания отбрасываются
+MIN_SCORE = 0.01
+
+
+def _decayed(now):
+    """Рейтинг строки, приведённый к моменту now."""
+    return F('score') * Exp(
+        (F('updated') - Value(now, output_field=FloatField())) * DECAY
+    )
+
+
+def _add(kind, object_id, weight, now):
+    rows = TrendingScore.objects.filter(kind=kind, object_id=object_id)
+    values = {'score': _decayed(now) + weight, 'updated': now}
+    if not rows.update(**values):
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(kind=kind, object_id=object_id, updated=now)],
+            ignore_conflicts=True
+        )
+        rows.update(**values)
+
+
+def compact(now=None):
+    """Оставляет по TRENDING_MAX_ITEMS заметных записей каждого вида."""
+    now = time.time() if now is None else now
+    with transaction.atomic():
+        for kind, _ in TrendingScore.KIND_CHOICES:
+            rows = TrendingScore.objects.filter(kind=kind)
+            keep = list(
+                rows.annotate(current=_decayed(now)).filter(
+                    current__gte=MIN_SCORE
+                ).order_by('-current').values_list('pk', flat=True)[
+                    :TRENDING_MAX_ITEMS
+                ]
+            )
+            rows.exclude(pk__in=keep).delete()
+
+
+def _record(weight, post_id=None, group_id=None, now=None):
+    now = time.time() if now is None else now
+    for kind, object_id in (
+        (TrendingScore.POST, post_id), (TrendingScore.GROUP, group_id)
+    ):
+        if object_id is not None:
+            _add(kind, object_id, weight, now)
+    # Уплотняет тот процесс, который первым заметил, что пора
+    if cache.add(COMPACT_KEY, True, TRENDING_COMPACT_INTERVAL):
+        compact(now)
+
+
+def record_comment(comment, now=None):
+    """Учитывает новый комментарий в рейтинге поста и его сообщества."""
+    _record(COMMENT_WEIGHT, comment.post_id, comment.post.group_id, now)
+
+
+def record_follow(follow, now=None):
+    """Учитывает новую подписку в рейтинге последнего поста автора."""
+    latest = Post.objects.filter(author_id=follow.author_id).values_list(
+        'pk', 'group_id'
+    ).first()
+    if latest is not None:
+        _record(FOLLOW_WEIGHT, *latest, now=now)
+
+
+def _forget(kind, pk):
+    TrendingScore.objects.filter(kind=kind, object_id=pk).delete()
+    cache.delete(RANKING_KEY.format(kind))
+
+
+def forget_post(post_id):
+    """Убирает удалённый пост из рейтинга, чтобы страницы не укорачивались."""
+    _forget(TrendingScore.POST, post_id)
+
+
+def forget_group(group_id):
+    """Убирает удалённое сообщество из рейтинга."""
+    _forget(TrendingScore.GROUP, group_id)
+
+
+def _ranking(kind):
+    key = RANKING_KEY.format(kind)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            TrendingScore.objects.filter(kind=kind).annotate(
+                current=_decayed(time.time())
+            ).filter(current__gte=MIN_SCORE).order_by(
+                '-current'
+            ).values_list('object_id', flat=True)[:TRENDING_MAX_ITEMS]
+        )
+        cache.set(key, ids, TRENDING_CACHE_TIMEOUT)
+    return ids
+
+
+def top_post_ids():
+    """id популярных постов по убыванию рейтинга."""
+    return _ranking(TrendingScore.POST)
+
+
+def top_group_ids(limit):
+    """id популярных сообществ по убыванию рейтинга."""
+    return _ranking(TrendingScore.GROUP)[:limit]
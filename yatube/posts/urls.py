@@ -6,8 +6,47 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('group/', views.group_index, name='group_index'),
+    path('archive/', views.archive, name='archive'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive,
+        name='archive'
+    ),
+    path(
+        'group/<slug:slug>/archive/',
+        views.group_archive,
+        name='group_archive'
+    ),
+    path(
+        'group/<slug:slug>/archive/<int:year>/<int:month>/',
+        views.group_archive,
+        name='group_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/',
+        views.author_archive,
+        name='author_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.author_archive,
+        name='author_archive'
+    ),
+    path('tag/<str:name>/', views.tag_posts, name='tag'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/stats/',
+        views.group_stats,
+        name='group_stats'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/stats/',
+        views.author_stats,
+        name='author_stats'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -15,8 +54,15 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/events/',
+        views.post_events,
+        name='post_events'
+    ),
+    path('events/', views.feed_events, name='feed_events'),
     path('create/', views.post_create, name='post_create'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('mentions/', views.mention_inbox, name='mentions'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -0,0 +1,206 @@
+"""Отложенная запись просмотров постов.
+
+Просмотр только увеличивает счётчик и дополняет скетч HyperLogLog
+в памяти процесса. Накопленное записывается пакетом: один UPDATE
+для счётчиков и один bulk_update для скетчей на каждые
+VIEWS_CHUNK_SIZE постов, поэтому блокировка записи SQLite берётся
+раз в VIEWS_FLUSH_INTERVAL секунд, а не на каждый просмотр. Запись
+по сроку идёт в фоновом потоке процесса (start_flusher), а не
+в обработке запросов; запрос пишет буфер сам, только если тот
+переполнен. При остановке процесса теряются лишь просмотры последних
+VIEWS_FLUSH_INTERVAL секунд — для статистики это допустимо.
+
+Статистика поста кешируется отдельно от самого поста, и после
+записи новые значения кладутся в кеш на место старых, так что
+закешированные посты не сбрасываются.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+
+from core.hyperloglog import HyperLogLog
+from yatube.settings import (
+    VIEW_STATS_CACHE_TIMEOUT, VIEWS_BUFFER_MAX, VIEWS_FLUSH_INTERVAL,
+    VIEWS_FLUSH_THREAD, VISITORS_PRECISION
+)
+from .models import Post, PostViewStats
+
+logger = logging.getLogger(__name__)
+
+VIEW_STATS_CACHE_KEY = 'posts:view_stats:{}'
+# Постов на один UPDATE: на пост приходится три параметра запроса
+# (id в IN и пара в CASE), а SQLite принимает не больше 999
+VIEWS_CHUNK_SIZE = 300
+
+lock = threading.Lock()
+pending_views = Counter()
+pending_visitors = {}
+last_flush = time.monotonic()
+flusher = None
+
+
+def visitor_id(request):
+    """Кто смотрит пост: пользователь или гость по IP и браузеру."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'guest:{}:{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', '')
+    )
+
+
+def record_view(post_id, visitor):
+    """Учитывает просмотр; переполненный буфер сразу пишется в базу."""
+    if VIEWS_FLUSH_THREAD:
+        start_flusher()
+    with lock:
+        pending_views[post_id] += 1
+        sketch = pending_visitors.get(post_id)
+        if sketch is None:
+            sketch = pending_visitors[post_id] = HyperLogLog(
+                VISITORS_PRECISION
+            )
+        sketch.add(visitor)
+        full = len(pending_views) >= VIEWS_BUFFER_MAX
+    if full:
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать просмотры постов')
+
+
+def start_flusher():
+    """Запускает фоновый поток записи просмотров, если он ещё не запущен.
+
+    Поток запускается при первом просмотре, поэтому после fork
+    у каждого процесса сервера оказывается свой.
+    """
+    global flusher
+    with lock:
+        if flusher is not None and flusher.is_alive():
+            return
+        flusher = threading.Thread(
+            target=flush_periodically, name='post-views', daemon=True
+        )
+        flusher.start()
+
+
+def flush_periodically():
+    while True:
+        time.sleep(VIEWS_FLUSH_INTERVAL)
+        flush_if_due()
+        # Соединение потока не должно висеть открытым между записями
+        connection.close()
+
+
+def flush_if_due():
+    """Записывает буфер, если подошёл срок или он переполнен."""
+    with lock:
+        due = pending_views and (
+            time.monotonic() - last_flush >= VIEWS_FLUSH_INTERVAL
+            or len(pending_views) >= VIEWS_BUFFER_MAX
+        )
+    if due:
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать просмотры постов')
+
+
+def _restore(views, visitors):
+    """Возвращает в буфер просмотры, которые не удалось записать."""
+    with lock:
+        pending_views.update(views)
+        for post_id, sketch in visitors.items():
+            if post_id in pending_visitors:
+                pending_visitors[post_id].merge(sketch)
+            else:
+                pending_visitors[post_id] = sketch
+
+
+def _write_chunk(views, visitors):
+    """Записывает просмотры части постов, возвращает их статистику."""
+    post_ids = set(
+        Post.objects.filter(pk__in=views).values_list('pk', flat=True)
+    )
+    if not post_ids:
+        return []
+    PostViewStats.objects.bulk_create(
+        [PostViewStats(post_id=post_id) for post_id in post_ids],
+        ignore_conflicts=True
+    )
+    PostViewStats.objects.filter(post_id__in=post_ids).update(
+        views=F('views') + Case(
+            *[
+                When(post_id=post_id, then=Value(views[post_id]))
+                for post_id in post_ids
+            ],
+            output_field=BigIntegerField()
+        )
+    )
+    stats = list(
+        PostViewStats.objects.select_for_update().filter(
+            post_id__in=post_ids
+        )
+    )
+    for row in stats:
+        sketch = row.visitors_sketch()
+        sketch.merge(visitors[row.post_id])
+        row.visitors = sketch.to_bytes()
+    PostViewStats.objects.bulk_update(stats, ['visitors'])
+    return stats
+
+
+def flush():
+    """Записывает накопленные просмотры в базу. Возвращает число постов."""
+    global last_flush
+    with lock:
+        views = dict(pending_views)
+        visitors = dict(pending_visitors)
+        pending_views.clear()
+        pending_visitors.clear()
+        last_flush = time.monotonic()
+    post_ids = list(views)
+    stats = []
+    try:
+        with transaction.atomic():
+            for start in range(0, len(post_ids), VIEWS_CHUNK_SIZE):
+                chunk = post_ids[start:start + VIEWS_CHUNK_SIZE]
+                stats += _write_chunk(
+                    {post_id: views[post_id] for post_id in chunk}, visitors
+                )
+    except Exception:
+        _restore(views, visitors)
+        raise
+    cache.set_many(
+        {VIEW_STATS_CACHE_KEY.format(row.post_id): row for row in stats},
+        VIEW_STATS_CACHE_TIMEOUT
+    )
+    return len(stats)
+
+
+def get_view_stats(post):
+    """Просмотры и уникальные читатели поста с учётом ещё не записанных.
+
+    Записанная статистика читается из кеша, при промахе — из базы.
+    """
+    key = VIEW_STATS_CACHE_KEY.format(post.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = (
+            PostViewStats.objects.filter(post_id=post.pk).first()
+            or PostViewStats(post_id=post.pk)
+        )
+        cache.set(key, stats, VIEW_STATS_CACHE_TIMEOUT)
+    views = stats.views
+    sketch = stats.visitors_sketch()
+    with lock:
+        views += pending_views.get(post.pk, 0)
+        if post.pk in pending_visitors:
+            sketch.merge(pending_visitors[post.pk])
+    return {'views': views, 'visitors': sketch.count()}
@@ -1,9 +1,26 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from core.utils import add_paginator
-from .models import Post, Group, Comment, Follow, User
+from datetime import date, timedelta
+
+from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
+from core.utils import add_paginator, add_upload_errors
+from . import follow_graph, live, mentions, trending
+from .archive import get_calendar, month_posts
+from .cache import get_post_or_404, get_group_or_404, get_group_index
+from .models import (
+    AuthorDailyStats, Follow, Group, GroupDailyStats, Mention, Post, Tag
+)
 from .forms import PostForm, CommentForm
+from .suggestions import get_suggestions
+from .tags import tag_feed
+from .view_counter import get_view_stats, record_view, visitor_id
 from django.contrib.auth.decorators import login_required
-from yatube.settings import NUMBER_OF_POSTS
+from django.db.models import Sum
+from django.utils import timezone
+from core.events import event_stream_response
+from users.cache import get_user_by_username_or_404
+from yatube.settings import (
+    NUMBER_OF_POSTS, STATS_DAYS, TRENDING_GROUPS_SHOWN
+)
 
 
 def index(request):
@@ -16,10 +33,32 @@ def index(request):
     return render(request, template, context)
 
 
+def trending_posts(request):
+    template = 'posts/trending.html'
+    page_obj = add_paginator(
+        request, trending.top_post_ids(), NUMBER_OF_POSTS
+    )
+    posts = Post.objects.select_related('group', 'author').in_bulk(
+        page_obj.object_list
+    )
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    group_ids = trending.top_group_ids(TRENDING_GROUPS_SHOWN)
+    groups = Group.objects.in_bulk(group_ids)
+    context = {
+        'page_obj': page_obj,
+        'trending_groups': [
+            groups[pk] for pk in group_ids if pk in groups
+        ],
+    }
+    return render(request, template, context)
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = get_group_or_404(slug)
+    post_list = group.posts.select_related('author')
     page_obj = add_paginator(request, post_list, NUMBER_OF_POSTS)
     context = {
         'group': group,
@@ -28,31 +67,59 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+def group_index(request):
+    template = 'posts/group_index.html'
+    context = {
+        'groups': get_group_index(),
+    }
+    return render(request, template, context)
+
+
+def tag_posts(request, name):
+    """Лента хештега; страницы листаются курсором ?after=."""
+    template = 'posts/tag.html'
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = tag_feed(
+        tag, request.GET.get('after'), NUMBER_OF_POSTS
+    )
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, template, context)
+
+
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
+    author = get_user_by_username_or_404(username)
     post_list = Post.objects.select_related('author').filter(author=author)
     page_obj = add_paginator(request, post_list, NUMBER_OF_POSTS)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        author=author,
-        user=request.user
-    ).exists()
+    following = request.user.is_authenticated and (
+        follow_graph.is_following(request.user.id, author.id)
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        'followers_count': follow_graph.follower_count(author.id),
     }
+    if request.user == author:
+        context['suggestions'] = get_suggestions(request.user)
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
-    post = Post.objects.select_related('author').get(pk=post_id)
-    comments = Comment.objects.prefetch_related('post').filter(post=post)
+    post = get_post_or_404(post_id)
+    record_view(post.pk, visitor_id(request))
+    comments = post.comments.select_related('author')
     form = CommentForm()
     context = {
         'post': post,
         'comments': comments,
-        'form': form
+        'form': form,
+        'view_stats': get_view_stats(post),
+        'tags': Tag.objects.filter(post_tags__post=post),
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -60,6 +127,7 @@ def post_detail(request, post_id):
 @login_required
 def post_create(request):
     form = PostForm(request.POST, files=request.FILES or None)
+    add_upload_errors(request, form)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -70,6 +138,8 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
+    # Форма сохраняет пост целиком, поэтому он читается из базы, а не из
+    # кеша, где могут быть устаревшие поля
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect("posts:post_detail", post_id)
@@ -78,6 +148,7 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
+    add_upload_errors(request, form)
     if form.is_valid():
         form.save()
         return redirect("posts:post_detail", post_id)
@@ -90,7 +161,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -102,17 +173,46 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    following = follow_graph.following_ids(request.user.id)
+    # Подзапрос вместо списка id: подписок может быть больше, чем
+    # SQLite принимает параметров в одном запросе
+    post_list = Post.objects.select_related('group', 'author').filter(
+        author_id__in=Follow.objects.filter(user=request.user).values(
+            'author_id'
+        )
+    )
     page_obj = add_paginator(request, post_list, NUMBER_OF_POSTS)
     context = {
         'page_obj': page_obj,
+        'suggestions': get_suggestions(request.user),
+        'live_authors': sorted(following),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def mention_inbox(request):
+    """Упоминания пользователя; показанные отмечаются прочитанными."""
+    template = 'posts/mentions.html'
+    mention_list = Mention.objects.filter(user=request.user).select_related(
+        'author', 'post', 'comment'
+    )
+    page_obj = add_paginator(request, mention_list, NUMBER_OF_POSTS)
+    # Страница читается до отметки, чтобы новые упоминания были выделены
+    page_obj.object_list = list(page_obj.object_list)
+    mentions.mark_read(
+        request.user.pk,
+        [mention.pk for mention in page_obj.object_list]
+    )
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_by_username_or_404(username)
     if request.user != author:
         follow, created = Follow.objects.get_or_create(
             user=request.user,
@@ -123,6 +223,128 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_by_username_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=author.username)
+
+
+def feed_events(request):
+    """Поток событий о новых постах для открытых лент."""
+    return event_stream_response(request, live.FEED_CHANNEL)
+
+
+def post_events(request, post_id):
+    """Поток новых комментариев к посту."""
+    post = get_post_or_404(post_id)
+    return event_stream_response(request, live.comments_channel(post.pk))
+
+
+def _stats_context(title, stats, fields):
+    """Контекст страницы статистики по строкам сводной таблицы.
+
+    Итоги считаются за всё время, строки — за последние STATS_DAYS
+    дней, включая сегодняшний; дни без активности строк не имеют.
+    """
+    since = timezone.localdate() - timedelta(days=STATS_DAYS - 1)
+    model_fields = [stats.model._meta.get_field(field) for field in fields]
+    totals = stats.aggregate(*[Sum(field) for field in fields])
+    return {
+        'title': title,
+        'columns': [field.verbose_name for field in model_fields],
+        'totals': [totals[f'{field}__sum'] or 0 for field in fields],
+        'rows': [
+            (row.day, [getattr(row, field) for field in fields])
+            for row in stats.filter(day__gte=since)
+        ],
+    }
+
+
+def author_stats(request, username):
+    author = get_user_by_username_or_404(username)
+    context = _stats_context(
+        f'Активность автора {author.get_full_name() or author.username}',
+        author.daily_stats.all(),
+        ['posts', 'comments', 'new_followers'],
+    )
+    context['back_url'] = reverse('posts:profile', args=[author.username])
+    return render(request, 'posts/stats.html', context)
+
+
+def group_stats(request, slug):
+    group = get_group_or_404(slug)
+    context = _stats_context(
+        f'Активность сообщества {group.title}',
+        GroupDailyStats.objects.filter(group_id=group.pk),
+        ['posts', 'comments'],
+    )
+    context['back_url'] = reverse('posts:group_list', args=[group.slug])
+    return render(request, 'posts/stats.html', context)
+
+
+def _archive(request, posts, calendar, url_name, url_args, title, year,
+             month):
+    """Страница архива: календарь и посты выбранного месяца."""
+    page_obj = None
+    if year is not None:
+        page_obj = add_paginator(
+            request, month_posts(posts, year, month), NUMBER_OF_POSTS
+        )
+    calendar = [
+        {
+            'year': row['year'],
+            'months': [
+                {
+                    'date': date(row['year'], number, 1),
+                    'count': count,
+                    'url': count and reverse(
+                        url_name, args=[*url_args, row['year'], number]
+                    ),
+                    'active': (row['year'], number) == (year, month),
+                }
+                for number, count in row['months']
+            ],
+        }
+        for row in calendar
+    ]
+    context = {
+        'title': title,
+        'calendar': calendar,
+        'page_obj': page_obj,
+        'month_date': year and date(year, month, 1),
+    }
+    return render(request, 'posts/archive.html', context)
+
+
+def archive(request, year=None, month=None):
+    return _archive(
+        request,
+        Post.objects.select_related('author', 'group'),
+        get_calendar('all', AuthorDailyStats.objects.all()),
+        'posts:archive', [], 'Архив записей', year, month,
+    )
+
+
+def group_archive(request, slug, year=None, month=None):
+    group = get_group_or_404(slug)
+    return _archive(
+        request,
+        group.posts.select_related('author'),
+        get_calendar(
+            f'group:{group.pk}',
+            GroupDailyStats.objects.filter(group_id=group.pk)
+        ),
+        'posts:group_archive', [group.slug],
+        f'Архив сообщества {group.title}', year, month,
+    )
+
+
+def author_archive(request, username, year=None, month=None):
+    author = get_user_by_username_or_404(username)
+    return _archive(
+        request,
+        author.posts.select_related('group'),
+        get_calendar(f'author:{author.pk}', author.daily_stats.all()),
+        'posts:author_archive', [author.username],
+        f'Архив записей {author.get_full_name() or author.username}',
+        year, month,
+    )
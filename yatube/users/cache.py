@@ -0,0 +1,101 @@
+"""Кеш пользователей: по имени, по id и пользователь сессии.
+
+Пользователь сессии кешируется под ключом из его id и хеша пароля,
+записанного в сессии (get_session_auth_hash), и только после того, как
+этот хеш сверен с пользователем из базы. Сохранение и удаление
+пользователя сбрасывают ключи со старым и новым хешем, поэтому смена
+пароля и отключение через save() завершают сессии сразу. Изменения
+в обход сигналов (QuerySet.update) действуют после USER_CACHE_TIMEOUT.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+
+from yatube.settings import USER_CACHE_TIMEOUT
+
+User = get_user_model()
+
+USERNAME_CACHE_KEY = 'users:username:{}'
+USER_ID_CACHE_KEY = 'users:id:{}'
+SESSION_USER_CACHE_KEY = 'users:session:{}:{}'
+
+
+def _username_key(username):
+    # Имя из адреса может содержать символы, недопустимые в ключах memcached
+    return USERNAME_CACHE_KEY.format(
+        hashlib.md5(username.encode()).hexdigest()
+    )
+
+
+def get_user_by_username_or_404(username):
+    """Аналог get_object_or_404 для пользователя по имени."""
+    key = _username_key(username)
+    user = cache.get(key)
+    if user is None:
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise Http404(f'Пользователь {username} не найден')
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user_by_id(user_id):
+    """Пользователь по id из кеша или из базы; None, если его нет."""
+    key = USER_ID_CACHE_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(username, user_id=None):
+    """Удаляет пользователя из кеша по имени и, если передан, по id."""
+    keys = [_username_key(username)]
+    if user_id is not None:
+        keys.append(USER_ID_CACHE_KEY.format(user_id))
+    cache.delete_many(keys)
+
+
+def _session_user_key(user_id, session_hash):
+    return SESSION_USER_CACHE_KEY.format(user_id, session_hash)
+
+
+def get_session_user(request):
+    """Пользователь сессии из кеша или, при промахе, из базы.
+
+    Промах обрабатывает django.contrib.auth.get_user: он сверяет хеш
+    пароля и завершает сессию, если хеш устарел.
+    """
+    session = request.session
+    try:
+        user_id = User._meta.pk.to_python(session[auth.SESSION_KEY])
+        session_hash = session[auth.HASH_SESSION_KEY]
+        backend = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+    key = _session_user_key(user_id, session_hash)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_session_user(user_id, *session_hashes):
+    """Удаляет пользователя сессии из кеша для данных хешей пароля."""
+    cache.delete_many([
+        _session_user_key(user_id, session_hash)
+        for session_hash in session_hashes
+    ])
@@ -0,0 +1,85 @@
+"""Хеширование паролей в отдельном ограниченном пуле потоков.
+
+PBKDF2 занимает процессор на десятки миллисекунд. Вычисление
+отпускает GIL, поэтому пул из нескольких потоков ограничивает число
+одновременных хеширований в процессе, а остальные потоки продолжают
+отдавать ленту. Если пул и очередь к нему заполнены, запрос сразу
+получает PasswordHashingBusy вместо ожидания.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from yatube.settings import PASSWORD_HASHING_WORKERS, PASSWORD_HASHING_QUEUE
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASHING_WORKERS, thread_name_prefix='password'
+)
+slots = threading.BoundedSemaphore(
+    PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_QUEUE
+)
+stats_lock = threading.Lock()
+stats = {
+    'in_flight': 0,
+    'max_in_flight': 0,
+    'completed': 0,
+    'rejected': 0,
+}
+
+
+class PasswordHashingBusy(Exception):
+    """Пул хеширования паролей и очередь к нему заполнены."""
+
+
+def hashing_stats():
+    """Текущая глубина очереди и счётчики пула хеширования процесса.
+
+    Счётчики попадают в журнал при каждом отказе, чтобы по нему было
+    видно, насколько пул не справляется.
+    """
+    with stats_lock:
+        return {
+            'workers': PASSWORD_HASHING_WORKERS,
+            'capacity': PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_QUEUE,
+            **stats,
+        }
+
+
+def run_in_pool(func, *args):
+    if not slots.acquire(blocking=False):
+        with stats_lock:
+            stats['rejected'] += 1
+        logger.warning(
+            'Пул хеширования паролей переполнен: занято %(in_flight)s '
+            'из %(capacity)s (максимум %(max_in_flight)s), выполнено '
+            '%(completed)s, отклонено %(rejected)s',
+            hashing_stats()
+        )
+        raise PasswordHashingBusy
+    with stats_lock:
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(
+            stats['max_in_flight'], stats['in_flight']
+        )
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        with stats_lock:
+            stats['in_flight'] -= 1
+            stats['completed'] += 1
+        slots.release()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 с теми же параметрами, что и у Django, но в пуле потоков.
+
+    Алгоритм в хеше не меняется, поэтому сохранённые пароли
+    проверяются без пересчёта.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return run_in_pool(super().encode, password, salt, iterations)
@@ -0,0 +1,38 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_session_user
+from .hashers import PasswordHashingBusy
+
+# Через сколько секунд предлагать повторить вход
+BUSY_RETRY_AFTER = 5
+
+
+class PasswordHashingBusyMiddleware:
+    """Отвечает 503, когда пул хеширования паролей переполнен."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, PasswordHashingBusy):
+            return None
+        response = HttpResponse(
+            'Сервер перегружен, попробуйте войти чуть позже',
+            status=503,
+            content_type='text/plain; charset=utf-8'
+        )
+        response['Retry-After'] = BUSY_RETRY_AFTER
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, берущий пользователя сессии из кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_session_user(request))
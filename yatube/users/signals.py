@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_session_user, invalidate_user
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=User)
+def drop_renamed_user(sender, instance, **kwargs):
+    """Сбрасывает кеш по старому имени и старому хешу пароля."""
+    if instance.pk is None:
+        return
+    old = User.objects.filter(pk=instance.pk).values_list(
+        'username', 'password'
+    ).first()
+    if old is None:
+        return
+    old_username, old_password = old
+    if old_username != instance.username:
+        invalidate_user(old_username)
+    if old_password != instance.password:
+        invalidate_session_user(
+            instance.pk, User(password=old_password).get_session_auth_hash()
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    """Сбрасывает кеш пользователя при его изменении или удалении."""
+    invalidate_user(instance.username, instance.pk)
+    invalidate_session_user(instance.pk, instance.get_session_auth_hash())
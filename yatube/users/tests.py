@@ -1,3 +1,122 @@
-# from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users import hashers
+
+User = get_user_model()
+
+
+def user_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if 'FROM "auth_user"' in query['sql']
+    ]
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='NoName', password='old-password'
+        )
+        self.client = Client()
+        self.client.login(username='NoName', password='old-password')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_profile_author_cached(self):
+        """Автор профиля при повторном просмотре берётся из кеша."""
+        url = reverse('posts:profile', args=[self.user.username])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['author'], self.user)
+        self.assertEqual(
+            [sql for sql in user_queries(queries) if '"username" =' in sql],
+            []
+        )
+
+    def test_session_user_cached(self):
+        """Пользователь сессии при повторном запросе берётся из кеша."""
+        url = reverse('about:author')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(user_queries(queries), [])
+
+    def test_deleted_user_logged_out(self):
+        """Удалённый пользователь теряет доступ сразу."""
+        self.client.get(reverse('posts:index'))
+        self.user.delete()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_change_ends_sessions(self):
+        """После смены пароля старая сессия перестаёт действовать."""
+        self.client.get(reverse('posts:index'))
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertRedirects(
+            response,
+            f'{reverse("users:login")}?next={reverse("posts:follow_index")}'
+        )
+
+    def test_inactive_user_logged_out(self):
+        """Отключённый пользователь теряет доступ сразу."""
+        self.client.get(reverse('posts:index'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_renamed_user_profile(self):
+        """После смены имени старый адрес профиля не находится."""
+        old_url = reverse('posts:profile', args=[self.user.username])
+        self.assertEqual(self.client.get(old_url).status_code, 200)
+        self.user.username = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:profile', args=['Renamed'])
+            ).status_code,
+            200
+        )
+
+
+class PooledHasherTests(TestCase):
+    def test_hashes_compatible_with_pbkdf2(self):
+        """Пароли хешируются прежним алгоритмом PBKDF2."""
+        encoded = make_password('secret-password')
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+        completed = hashers.hashing_stats()['completed']
+        self.assertTrue(check_password('secret-password', encoded))
+        self.assertGreater(hashers.hashing_stats()['completed'], completed)
+
+    def test_login_rejected_when_pool_full(self):
+        """При переполненном пуле вход получает 503, а не ждёт."""
+        User.objects.create_user(
+            username='NoName', password='secret-password'
+        )
+        rejected = hashers.hashing_stats()['rejected']
+        with mock.patch.object(hashers, 'slots', threading.Semaphore(0)):
+            with self.assertLogs('users.hashers', 'WARNING') as logs:
+                response = self.client.post(
+                    reverse('users:login'),
+                    {'username': 'NoName', 'password': 'secret-password'}
+                )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn(f'отклонено {rejected + 1}', logs.output[0])
+        self.assertIn('Retry-After', response)
+        self.assertEqual(hashers.hashing_stats()['rejected'], rejected + 1)
@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 
 
 LOGIN_URL = 'users:login'
@@ -45,10 +47,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # Пользователь сессии берётся из кеша (users.cache.get_session_user)
+    'users.middleware.CachedAuthenticationMiddleware',
+    # Лимиты знают пользователя и проверяются до разбора тела запроса
+    # в CSRF
+    'core.middleware.RateLimitMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.PasswordHashingBusyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,6 +76,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.mentions.mentions',
             ],
         },
     },
@@ -105,6 +114,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Пароли хешируются в ограниченном пуле потоков (users.hashers)
+PASSWORD_HASHERS = [
+    'users.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASHING_WORKERS = 2
+# Сколько хеширований может ждать свободного потока, прежде чем
+# новые запросы получат 503
+PASSWORD_HASHING_QUEUE = 8
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -127,12 +148,37 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
 STATIC_URL = '/static/'
+# Сюда collectstatic собирает статику с хешами в именах и сжатыми копиями
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.ManifestStaticStorage'
 
+# Письма ставятся в очередь (core.mail), команда send_queued_mail
+# отправляет их через OUTBOX_DELIVERY_BACKEND
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
 # Эмуляция почтового сервера
 #  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Сколько раз пытаться отправить письмо и пауза перед первым повтором
+# (в секундах, дальше удваивается)
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+# На сколько секунд отправка забирает письмо: если она упадёт, не
+# записав результат, письмо снова попадёт в очередь по истечении срока
+OUTBOX_CLAIM_TIMEOUT = 60 * 10
+
+# Адрес сайта для ссылок в письмах
+SITE_URL = 'http://localhost:8000'
+
+# Рассылка новых постов подписчикам: за какой период (в секундах)
+# брать посты при первом запуске и сколько постов показывать в письме
+DIGEST_FIRST_PERIOD = 60 * 60 * 24
+DIGEST_MAX_POSTS = 10
+DIGEST_SUBJECT = 'Новые посты авторов, на которых вы подписаны'
+# Посты моложе стольких секунд ждут следующей рассылки: пост с меньшим
+# id из ещё не завершённой транзакции должен успеть появиться в базе
+DIGEST_LAG = 60
 
 # Кастомная функция для ошибки 403
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -140,14 +186,163 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Тесты запущены через manage.py test или pytest
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# Кеш общий для всех процессов сервера: на него опираются сессии,
+# лимиты запросов и сброс закешированных объектов. Файловый кеш
+# разделяют процессы одной машины; при нескольких машинах его нужно
+# заменить на memcached. Кеш при переполнении выбрасывает треть
+# записей, а add и incr в нём не атомарны: в кеше хранится только то,
+# что можно восстановить из базы, и то, где потеря или неточный счёт
+# допустимы (лимиты запросов). Единственная копия данных и счётчики,
+# которым нужна точность, хранятся в базе.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
+if TESTING:
+    # Тесты очищают кеш, поэтому у них свой кеш в памяти: иначе запуск
+    # тестов стирал бы кеш работающего на той же машине сервера
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'yatube-tests',
+        }
+    }
+    # Тесты идут в одном процессе, общий кеш для сессий им не нужен
+    SILENCED_SYSTEM_CHECKS = ['core.W001']
+
+# Сессии читаются из кеша, в таблицу сессий запрос идёт только при
+# промахе и при изменении сессии. Гостям без куки сессия не создаётся.
+# Кеш должен быть общим для процессов, иначе выход из аккаунта в одном
+# процессе не виден другим (проверка core.W001)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 # Длина названия объектов в методе __str__
 LEN_OBJ_NAME = 15
 
 # Число постов на страницах проекта
 NUMBER_OF_POSTS = 10
+
+# Время жизни закешированного поста (в секундах)
+POST_CACHE_TIMEOUT = 60 * 5
+
+# Время жизни отметки об отсутствующем посте (в секундах)
+MISSING_POST_CACHE_TIMEOUT = 60
+
+# Время жизни закешированных пользователей (в секундах)
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Время жизни закешированного числа непрочитанных упоминаний (в секундах);
+# число сбрасывается при новых упоминаниях и прочтении, срок лишь
+# ограничивает расхождение, если сброс не дошёл до кеша
+MENTIONS_CACHE_TIMEOUT = 60 * 5
+
+# Время жизни закешированных сообществ и их списка (в секундах)
+GROUP_CACHE_TIMEOUT = 60 * 15
+
+# Время жизни закешированных множеств подписок (в секундах)
+FOLLOW_CACHE_TIMEOUT = 60 * 60
+
+# Сколько рекомендаций подписок хранить для пользователя
+SUGGESTIONS_PER_USER = 20
+
+# Сколько рекомендаций подписок показывать на странице
+SUGGESTIONS_SHOWN = 5
+
+# Период полураспада веса событий в рейтинге популярного (в секундах)
+TRENDING_HALF_LIFE = 60 * 60 * 6
+
+# Сколько постов и сообществ хранить в рейтинге популярного
+TRENDING_MAX_ITEMS = 500
+
+# Как часто уплотнять рейтинг популярного (в секундах)
+TRENDING_COMPACT_INTERVAL = 60 * 60
+
+# Время жизни закешированного порядка популярного (в секундах)
+TRENDING_CACHE_TIMEOUT = 60
+
+# Сколько популярных сообществ показывать на странице
+TRENDING_GROUPS_SHOWN = 5
+
+# Ширины версий картинок постов (в пикселях) и пропорции кадра
+IMAGE_RENDITION_WIDTHS = (320, 640, 960)
+IMAGE_ASPECT_RATIO = 339 / 960
+
+# Ширина картинки на странице при разных размерах экрана
+IMAGE_SIZES = '(max-width: 960px) 100vw, 960px'
+
+# Время жизни закешированных описаний версий картинок (в секундах)
+RENDITIONS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Ограничения частоты запросов по имени маршрута:
+# (число запросов, окно в секундах, ограничиваемые методы)
+RATELIMITS = {
+    'posts:post_create': (10, 60 * 60, ('POST',)),
+    'posts:add_comment': (30, 60 * 10, ('POST',)),
+    'posts:profile_follow': (60, 60 * 60, ('GET', 'POST')),
+    'users:signup': (5, 60 * 60, ('POST',)),
+    'users:login': (20, 60 * 10, ('POST',)),
+}
+
+# Сколько доверенных прокси (nginx, балансировщик) стоит перед сайтом.
+# При 0 адрес гостя для лимитов — REMOTE_ADDR; за прокси это адрес
+# самого прокси, и все гости делили бы один лимит. Каждый прокси должен
+# дописывать адрес клиента в X-Forwarded-For (в nginx:
+# proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for);
+# записям левее доверенных прокси не верим, их подставляет клиент
+RATELIMIT_PROXIES = 0
+
+# Живые обновления ленты и комментариев (core.events) — по кнопке,
+# коротким опросом. LocalTransport хранит события в памяти процесса;
+# при нескольких процессах нужен 'core.events.CacheTransport' и кеш
+# EVENTS_CACHE с атомарным incr (memcached, Redis)
+EVENTS_TRANSPORT = 'core.events.LocalTransport'
+EVENTS_CACHE = 'default'
+# Сколько последних событий канала отдавать переподключившимся, сколько
+# живут события в кеше и пауза браузера между опросами (в секундах)
+EVENTS_BUFFER_SIZE = 100
+EVENTS_TIMEOUT = 60 * 10
+EVENTS_RETRY = 10
+
+# За сколько последних дней показывать сводную статистику
+STATS_DAYS = 30
+
+# Сколько секунд сводная статистика выжидает, прежде чем учесть новую
+# строку: строка с меньшим id из ещё не завершённой транзакции должна
+# успеть появиться в базе до того, как отметка уйдёт дальше неё
+ROLLUP_LAG = 60
+
+# Время жизни закешированного календаря архива (в секундах); календарь
+# также сбрасывается после каждого пересчёта сводной статистики
+ARCHIVE_CALENDAR_TIMEOUT = 60 * 60
+
+# Просмотры постов копятся в памяти процесса и записываются в базу
+# одним пакетом: фоновым потоком процесса раз в VIEWS_FLUSH_INTERVAL
+# секунд или сразу при накоплении VIEWS_BUFFER_MAX постов. В тестах
+# фоновый поток не запускается, они вызывают запись сами
+VIEWS_FLUSH_INTERVAL = 10
+VIEWS_BUFFER_MAX = 1000
+VIEWS_FLUSH_THREAD = not TESTING
+# Время жизни закешированной статистики просмотров поста (в секундах);
+# запись просмотров обновляет её в кеше на месте
+VIEW_STATS_CACHE_TIMEOUT = 60 * 5
+# Точность HyperLogLog для уникальных читателей: 2**12 регистров,
+# ошибка около 1.6%
+VISITORS_PRECISION = 12
+
+# Загрузки сразу пишутся во временный файл и отклоняются по размеру
+# и числу пикселей до декодирования картинки
+FILE_UPLOAD_HANDLERS = ['core.uploadhandlers.LimitedUploadHandler']
+UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+
+# Картинка, загруженная меньше стольких секунд назад, не удаляется вместе
+# с последним постом: её мог только что загрузить другой пост
+IMAGE_RELEASE_GRACE = 60 * 60